@@ -0,0 +1,118 @@
+"""
+Triples per second when aggregating page graphs, with and without bulkLoad.
+
+Pages of synthetic Dataset triples are merged into an aggregate graph,
+in memory and in a SQLiteStore. The merge per page (``agg += page``, and a
+commit per page for the store) is compared with a single bulkLoad over all
+pages. Throughput is reported as the aggregate grows.
+
+Run with::
+
+  $ python benchmarks/bench_bulkload.py [n_triples]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+import rdflib
+
+import sotools.common
+
+SO = sotools.common.SO
+PAGE_DATASETS = 100
+
+
+def pages(n_triples):
+    # Yields lists of ~1500 triples, as loaded from a catalog page
+    n = 0
+    i = 0
+    while n < n_triples:
+        page = []
+        for j in range(PAGE_DATASETS):
+            ds = rdflib.URIRef(f"https://example.org/dataset/{i}/{j}")
+            ident = rdflib.BNode()
+            enc = rdflib.BNode()
+            page += [
+                (ds, rdflib.RDF.type, SO.Dataset),
+                (ds, SO.name, rdflib.Literal(f"Dataset {i} {j}")),
+                (ds, SO.description, rdflib.Literal("A synthetic dataset for benchmarking.")),
+                (ds, SO.identifier, rdflib.Literal(f"ds-{i}-{j}")),
+                (ds, SO.identifier, ident),
+                (ident, rdflib.RDF.type, SO.PropertyValue),
+                (ident, SO.propertyID, rdflib.Literal("DOI")),
+                (ident, SO.value, rdflib.Literal(f"10.5072/example.{i}.{j}")),
+                (ident, SO.url, rdflib.URIRef(f"https://doi.org/10.5072/example.{i}.{j}")),
+                (ds, SO.encoding, enc),
+                (enc, rdflib.RDF.type, SO.MediaObject),
+                (enc, SO.contentUrl, rdflib.URIRef(f"https://example.org/dataset/{i}/{j}.xml")),
+                (enc, SO.encodingFormat, rdflib.Literal("http://www.isotc211.org/2005/gmd")),
+                (enc, SO.dateModified, rdflib.Literal("2019-12-01")),
+                (enc, SO.description, rdflib.Literal("ISO metadata")),
+            ]
+        n += len(page)
+        i += 1
+        yield page
+
+
+class Progress:
+    def __init__(self, label, step):
+        self.label = label
+        self.step = step
+        self.n = 0
+        self.next = step
+        self.t0 = time.perf_counter()
+        self.t_last = self.t0
+        self.n_last = 0
+
+    def update(self, n):
+        self.n += n
+        if self.n >= self.next:
+            t = time.perf_counter()
+            rate = (self.n - self.n_last) / (t - self.t_last)
+            print(f"  {self.label:<22} {self.n:>10} triples  {rate:>10.0f} triples/s")
+            self.t_last = t
+            self.n_last = self.n
+            self.next += self.step
+
+
+def counted(progress, n_triples):
+    for page in pages(n_triples):
+        yield from page
+        progress.update(len(page))
+
+
+def main():
+    n_triples = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    step = max(n_triples // 4, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        print("in memory")
+        agg = rdflib.ConjunctiveGraph()
+        progress = Progress("agg += page", step)
+        for page in pages(n_triples):
+            agg += page
+            progress.update(len(page))
+        agg = rdflib.ConjunctiveGraph()
+        sotools.common.bulkLoad(agg, counted(Progress("bulkLoad", step), n_triples))
+        del agg
+
+        print("SQLiteStore")
+        corpus = sotools.common.openSOStore(os.path.join(tmp, "page.sqlite"))
+        progress = Progress("agg += page, commit", step)
+        for page in pages(n_triples):
+            corpus += page
+            corpus.commit()
+            progress.update(len(page))
+        corpus.close()
+        corpus = sotools.common.openSOStore(os.path.join(tmp, "bulk.sqlite"))
+        progress = Progress("bulkLoad", step)
+        t0 = time.perf_counter()
+        sotools.common.bulkLoad(corpus, counted(progress, n_triples))
+        elapsed = time.perf_counter() - t0
+        print(f"  bulkLoad total incl. index build: {progress.n / elapsed:.0f} triples/s")
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare JsonLdScanner with extruct for finding JSON-LD in landing pages.
+
+A fixture set of large HTML pages, each with a single small JSON-LD block,
+is written to a temporary folder along with the example landing page.
+
+Run with::
+
+  $ python benchmarks/bench_extractjsonld.py [n_pages] [page_kb]
+
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import sotools.common
+
+DATA_FOLDER = os.path.join(
+    os.path.dirname(__file__), "../docsource/source/examples/data/"
+)
+
+JSONLD = """<script type="application/ld+json">
+{"@context": {"@vocab": "https://schema.org/"}, "@type": "Dataset",
+ "@id": "https://example.org/dataset/%d", "identifier": "ds-%d"}
+</script>"""
+
+
+def makePage(i, page_kb):
+    rows = []
+    size = 0
+    j = 0
+    while size < page_kb * 1024:
+        row = (
+            f'<tr class="file"><td><a href="/data/{i}/file_{j}.nc">file_{j}.nc</a></td>'
+            f"<td>{j * 1024}</td><td>2019-12-01</td></tr>\n"
+        )
+        rows.append(row)
+        size += len(row)
+        j += 1
+    return (
+        "<!DOCTYPE html><html><head><title>Dataset</title>"
+        '<script src="/static/app.js"></script>'
+        + JSONLD % (i, i)
+        + "</head><body><table>"
+        + "".join(rows)
+        + "</table></body></html>"
+    )
+
+
+def timeExtract(pages, fast):
+    t0 = time.perf_counter()
+    n = 0
+    for html in pages:
+        n += len(sotools.common.extractJsonLd(html, fast=fast))
+    return time.perf_counter() - t0, n
+
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    page_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(n_pages):
+            with open(os.path.join(tmp, f"page_{i:04d}.html"), "w") as f:
+                f.write(makePage(i, page_kb))
+        for fname in glob.glob(os.path.join(DATA_FOLDER, "*.html")):
+            shutil.copy(fname, tmp)
+        pages = []
+        for fname in sorted(glob.glob(os.path.join(tmp, "*.html"))):
+            with open(fname, "rb") as f:
+                pages.append(f.read())
+    print(f"{len(pages)} pages, {sum(len(p) for p in pages) / 1e6:.1f} MB")
+    results = {}
+    for name, fast in (("extruct", False), ("scanner", True)):
+        elapsed, n = timeExtract(pages, fast)
+        results[name] = elapsed
+        print(f"{name:>8}: {elapsed:7.3f} s  {elapsed / len(pages) * 1000:7.2f} ms/page  {n} items")
+    print(f"speedup: {results['extruct'] / results['scanner']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compare iterative getSubgraph with the previous recursive implementation.
+
+The test graph is a catalog of nested nodes where every node also links a
+set of shared BNodes, as is common for publisher and license entries.
+
+Run with::
+
+  $ python benchmarks/bench_getsubgraph.py [n_nodes]
+
+"""
+import sys
+import time
+
+import rdflib
+from rdflib.namespace import NamespaceManager
+
+import sotools.common
+
+EX = rdflib.Namespace("https://example.net/")
+
+
+def legacyInflateSubgraph(g, sg, ts, depth=0, max_depth=100):
+    new_trips = []
+    for t in ts:
+        if isinstance(t[2], rdflib.term.Identifier):
+            trips = g.triples((t[2], None, None))
+            for trip in trips:
+                if not trip in sg:
+                    sg.add(trip)
+                    new_trips.append(trip)
+    if len(new_trips) > 0:
+        depth += 1
+        if depth > max_depth:
+            return
+        legacyInflateSubgraph(g, sg, new_trips, depth=depth)
+
+
+def legacyGetSubgraph(g, subject, max_depth=100):
+    sg = rdflib.ConjunctiveGraph()
+    sg.namespace_manager = NamespaceManager(g)
+    sg += g.triples((subject, None, None))
+    legacyInflateSubgraph(g, sg, sg, max_depth=max_depth)
+    return sg
+
+
+def catalog(n_nodes, fanout=3, n_shared=10):
+    g = rdflib.ConjunctiveGraph()
+    shared = [rdflib.BNode() for i in range(n_shared)]
+    for i, b in enumerate(shared):
+        g.add((b, EX.name, rdflib.Literal(f"shared {i}")))
+        g.add((b, EX.url, rdflib.Literal(f"https://example.net/org/{i}")))
+    for i in range(1, n_nodes):
+        g.add((EX[f"n{(i - 1) // fanout}"], EX.hasPart, EX[f"n{i}"]))
+    for i in range(n_nodes):
+        g.add((EX[f"n{i}"], EX.name, rdflib.Literal(f"node {i}")))
+        for b in shared:
+            g.add((EX[f"n{i}"], EX.publisher, b))
+    return g
+
+
+def main():
+    n_nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    g = catalog(n_nodes)
+    print(f"graph: {len(g)} triples")
+    for name, func in (("recursive", legacyGetSubgraph), ("iterative", sotools.common.getSubgraph)):
+        t0 = time.perf_counter()
+        sg = func(g, EX.n0)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:>10}: {elapsed:7.3f} s  {len(sg)} triples")
+
+
+if __name__ == "__main__":
+    main()
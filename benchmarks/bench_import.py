@@ -0,0 +1,66 @@
+"""
+Startup cost of importing sotools.
+
+Reports the wall time of a fresh interpreter importing sotools, loading a
+graph and extracting the Dataset identifiers, compared with one that also
+uses the validation, rendering, HTML and HTTP functions. The modules these
+pull in are listed, so imports that become eager again stand out.
+
+Run with::
+
+  $ python benchmarks/bench_import.py [repeat]
+
+"""
+import os
+import subprocess
+import sys
+import time
+
+DATA = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "../docsource/source/examples/data/ds_m_encoding.json",
+)
+
+HEAVY_MODULES = ("pyshacl", "owlrl", "graphviz", "extruct", "lxml", "requests", "rdflib.plugins.sparql")
+
+SCENARIOS = {
+    "python": "pass",
+    "import sotools": "import sotools",
+    "load and extract": (
+        "import sotools\n"
+        f"g = sotools.loadSOGraph(filename={DATA!r})\n"
+        "sotools.getDatasetIdentifiers(g)\n"
+    ),
+    "all submodules": (
+        "import sotools\n"
+        "sotools.validateSHACL, sotools.renderGraph, sotools.extractJsonLd('')\n"
+        "sotools.loadSOGraphFromUrl, sotools.hasDataset\n"
+    ),
+}
+
+
+def run(code):
+    script = code + (
+        "\nimport sys\n"
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    t0 = time.perf_counter()
+    res = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", script],
+        capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - t0, res.stdout.strip()
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for name, code in SCENARIOS.items():
+        times = []
+        for _ in range(repeat):
+            elapsed, modules = run(code)
+            times.append(elapsed)
+        print(f"{name:>18}: {min(times) * 1000:7.1f} ms  {modules}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare full RDFS inference with scoped inference for SHACL validation.
+
+A synthetic catalog is validated against shapes that target
+SO:CreativeWork, with the class hierarchy given in a small ontology graph.
+Full RDFS inference computes the closure of the whole data graph, scoped
+inference only adds the rdf:type statements the shapes need. Each variant
+runs in a separate process and reports wall time, peak RSS and the number
+of validation results.
+
+Run with::
+
+  $ python benchmarks/bench_inference.py [n_datasets]
+
+"""
+import json
+import os
+import sys
+import tempfile
+
+import rdflib
+
+import benchutil
+import sotools.common
+import synthetic
+
+SHAPES = """@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix SO: <https://schema.org/> .
+SO:CreativeWorkShape a sh:NodeShape ;
+    sh:targetClass SO:CreativeWork ;
+    sh:property [ sh:path SO:name ; sh:minCount 1 ] ;
+    sh:property [ sh:path SO:encoding ; sh:class SO:MediaObject ] .
+"""
+
+ONTOLOGY = """@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix SO: <https://schema.org/> .
+SO:CreativeWork rdfs:subClassOf SO:Thing .
+SO:Dataset rdfs:subClassOf SO:CreativeWork .
+SO:MediaObject rdfs:subClassOf SO:CreativeWork .
+SO:DataDownload rdfs:subClassOf SO:MediaObject .
+SO:PropertyValue rdfs:subClassOf SO:StructuredValue .
+SO:StructuredValue rdfs:subClassOf SO:Intangible .
+SO:Intangible rdfs:subClassOf SO:Thing .
+SO:name rdfs:domain SO:Thing .
+SO:description rdfs:domain SO:Thing .
+SO:identifier rdfs:domain SO:Thing .
+SO:encoding rdfs:domain SO:CreativeWork .
+SO:encoding rdfs:range SO:MediaObject .
+SO:contentUrl rdfs:domain SO:MediaObject .
+"""
+
+
+def validate(filename, inference):
+    shapes = rdflib.Graph()
+    shapes.parse(data=SHAPES, format="turtle")
+    ont = rdflib.Graph()
+    ont.parse(data=ONTOLOGY, format="turtle")
+    g = sotools.common.loadSOGraph(filename=filename)
+    validator = sotools.common.ShapeValidator(
+        shapes, inference=inference, ont_graph=ont
+    )
+    conforms, result_graph, _ = validator.validate(g)
+    return len(list(result_graph.subjects(rdflib.RDF.type, rdflib.SH.ValidationResult)))
+
+
+def main():
+    n_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, "catalog.json")
+        doc = synthetic.datasetJsonLd(n_datasets=n_datasets, vocab="http://schema.org")
+        with open(fname, "w") as f:
+            json.dump(doc, f)
+        print(f"catalog: {n_datasets} datasets")
+        for inference in ("rdfs", "scoped"):
+            elapsed, rss, n_results = benchutil.measureInChild(validate, fname, inference)
+            print(
+                f"{inference:>8}: {elapsed:7.2f} s  peak RSS {rss / 1024:8.1f} MiB  "
+                f"{n_results} results"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare single pass loadSOGraph with the previous two graph implementation.
+
+Reports wall time and peak RSS of each variant loading a synthetic JSON-LD
+catalog, each run in a separate process.
+
+Run with::
+
+  $ python benchmarks/bench_loadsograph.py [n_datasets]
+
+"""
+import json
+import os
+import sys
+import tempfile
+
+from rdflib import ConjunctiveGraph
+from rdflib.namespace import NamespaceManager
+
+import benchutil
+import sotools.common
+import sotools.loading
+import synthetic
+
+
+def legacyLoadSOGraph(filename):
+    # The implementation prior to single pass normalization
+    g = ConjunctiveGraph()
+    g.parse(filename, format="json-ld")
+    ns = NamespaceManager(g)
+    ns.bind(sotools.common.SO_PREFIX, sotools.common.SCHEMA_ORG, override=True, replace=True)
+    g2 = ConjunctiveGraph()
+    g2.namespace_manager = ns
+    for s, p, o in g:
+        trip = [s, p, o]
+        for i, t in enumerate(trip):
+            trip[i] = sotools.loading._normalizeTerm(t)
+        for i, t in enumerate(trip):
+            trip[i] = sotools.loading._desloppifyTerm(t)
+        g2.add(trip)
+    return len(g2)
+
+
+def singlePassLoadSOGraph(filename):
+    return len(sotools.common.loadSOGraph(filename=filename))
+
+
+def main():
+    n_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        fname = os.path.join(tmp, "catalog.json")
+        # A sloppy namespace, so that every term is rewritten
+        doc = synthetic.datasetJsonLd(n_datasets=n_datasets, vocab="http://schema.org")
+        with open(fname, "w") as f:
+            json.dump(doc, f)
+        size_mb = os.path.getsize(fname) / 1e6
+        print(f"catalog: {n_datasets} datasets, {size_mb:.1f} MB")
+        for name, func in (
+            ("two graph", legacyLoadSOGraph),
+            ("single pass", singlePassLoadSOGraph),
+        ):
+            elapsed, rss, ntriples = benchutil.measureInChild(func, fname)
+            print(f"{name:>12}: {elapsed:7.2f} s  peak RSS {rss / 1024:8.1f} MiB  {ntriples} triples")
+
+
+if __name__ == "__main__":
+    main()
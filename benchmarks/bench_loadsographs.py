@@ -0,0 +1,62 @@
+"""
+Throughput of loadSOGraphs with increasing numbers of worker processes.
+
+The example documents in ``docsource/source/examples/data`` are replicated
+to build a local corpus.
+
+Run with::
+
+  $ python benchmarks/bench_loadsographs.py [n_files]
+
+"""
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import sotools.common
+
+DATA_FOLDER = os.path.join(
+    os.path.dirname(__file__), "../docsource/source/examples/data/"
+)
+
+
+def makeCorpus(folder, n_files):
+    examples = [
+        f for f in sorted(glob.glob(os.path.join(DATA_FOLDER, "*.json")))
+        if not f.endswith("_result.json")
+    ]
+    fnames = []
+    for i in range(n_files):
+        fname = os.path.join(folder, f"doc_{i:06d}.json")
+        shutil.copyfile(examples[i % len(examples)], fname)
+        fnames.append(fname)
+    return fnames
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    ncpu = os.cpu_count() or 1
+    counts = sorted(set([1, 2, 4, ncpu]))
+    with tempfile.TemporaryDirectory() as tmp:
+        fnames = makeCorpus(tmp, n_files)
+        print(f"corpus: {n_files} files, {ncpu} CPUs")
+        for ntriples in (False, True):
+            for workers in counts:
+                t0 = time.perf_counter()
+                n_ok = 0
+                for res in sotools.common.loadSOGraphs(
+                    fnames, workers=workers, ntriples=ntriples
+                ):
+                    n_ok += res.error is None
+                elapsed = time.perf_counter() - t0
+                print(
+                    f"workers={workers:<3} ntriples={ntriples!s:<5} "
+                    f"{elapsed:7.2f} s  {n_files / elapsed:8.1f} docs/s  ({n_ok} ok)"
+                )
+
+
+if __name__ == "__main__":
+    main()
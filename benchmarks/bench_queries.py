@@ -0,0 +1,99 @@
+"""
+Per call latency of the dataset extraction helpers on the example fixtures.
+
+Each helper is timed with its query prepared once and reused, and with the
+query text re-parsed on every call as was done previously. The five SPARQL
+queries behind identifiers and metadata links are then compared with the
+single graph walk of extractDatasetSummary on the fixtures and on a
+synthetic catalog.
+
+Run with::
+
+  $ python benchmarks/bench_queries.py [repeat]
+
+"""
+import glob
+import json
+import os
+import sys
+import time
+
+import sotools.common
+import sotools.extraction
+import synthetic
+
+DATA_FOLDER = os.path.join(
+    os.path.dirname(__file__), "../docsource/source/examples/data/"
+)
+
+HELPERS = (
+    sotools.common.hasDataset,
+    sotools.common.getLiteralDatasetIdentifiers,
+    sotools.common.getStructuredDatasetIdentifiers,
+    sotools.common.getDatasetMetadataLinksFromEncoding,
+    sotools.common.getDatasetMetadataLinksFromSubjectOf,
+    sotools.common.getDatasetMetadataLinksFromAbout,
+)
+
+
+def timeHelpers(graphs, repeat):
+    res = {}
+    for helper in HELPERS:
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            for g in graphs:
+                helper(g)
+        res[helper.__name__] = (time.perf_counter() - t0) / (repeat * len(graphs))
+    return res
+
+
+def sparqlSummary(g):
+    ids = sotools.common.getLiteralDatasetIdentifiers(g)
+    ids += sotools.common.getStructuredDatasetIdentifiers(g)
+    links = sotools.common.getDatasetMetadataLinksFromEncoding(g)
+    links += sotools.common.getDatasetMetadataLinksFromSubjectOf(g)
+    links += sotools.common.getDatasetMetadataLinksFromAbout(g)
+    return {"identifiers": ids, "metadata": links}
+
+
+def timeSummary(graphs, repeat):
+    res = {}
+    for func in (sparqlSummary, sotools.common.extractDatasetSummary):
+        t0 = time.perf_counter()
+        for i in range(repeat):
+            for g in graphs:
+                func(g)
+        res[func.__name__] = (time.perf_counter() - t0) / (repeat * len(graphs))
+    return res
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    graphs = [
+        sotools.common.loadSOGraph(filename=f)
+        for f in sorted(glob.glob(os.path.join(DATA_FOLDER, "*.json")))
+        if not f.endswith("_result.json")
+    ]
+    prepared = timeHelpers(graphs, repeat)
+    # Defeat the prepared query cache, queries are parsed on every call
+    cached = sotools.extraction._preparedQuery
+    sotools.extraction._preparedQuery = cached.__wrapped__
+    try:
+        unprepared = timeHelpers(graphs, repeat)
+    finally:
+        sotools.extraction._preparedQuery = cached
+    print(f"{'helper':<40}{'parsed':>12}{'prepared':>12}")
+    for name in prepared:
+        print(f"{name:<40}{unprepared[name] * 1e3:>10.3f}ms{prepared[name] * 1e3:>10.3f}ms")
+    print()
+    doc = synthetic.datasetJsonLd(n_datasets=1000, vocab="http://schema.org")
+    catalog = sotools.common.loadSOGraph(data=json.dumps(doc))
+    for label, gs, n in (("fixtures", graphs, repeat), ("1000 dataset catalog", [catalog], 1)):
+        res = timeSummary(gs, n)
+        print(f"{label}:")
+        for name, elapsed in res.items():
+            print(f"  {name:<38}{elapsed * 1e3:>10.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Throughput of SHACL validation over a corpus of documents.
+
+Compares calling validateSHACL for each document with validateSHACLBatch
+using increasing numbers of worker processes. The example documents in
+``docsource/source/examples/data`` are replicated to build the corpus.
+
+Run with::
+
+  $ python benchmarks/bench_validate.py [n_files]
+
+"""
+import os
+import sys
+import tempfile
+import time
+
+import rdflib
+import sotools.common
+from bench_loadsographs import makeCorpus
+
+SHAPES = os.path.join(
+    os.path.dirname(__file__), "../sotools/data/shapes/ds_metadata_encoding_shape.ttl"
+)
+
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    ncpu = os.cpu_count() or 1
+    counts = sorted(set([1, 2, 4, ncpu]))
+    shape_graph = rdflib.ConjunctiveGraph()
+    shape_graph.parse(SHAPES, format="turtle")
+    with tempfile.TemporaryDirectory() as tmp:
+        fnames = makeCorpus(tmp, n_files)
+        print(f"corpus: {n_files} files, {ncpu} CPUs")
+        t0 = time.perf_counter()
+        for fname in fnames:
+            g = sotools.common.loadSOGraph(filename=fname)
+            sotools.common.validateSHACL(shape_graph, g)
+        elapsed = time.perf_counter() - t0
+        print(f"validateSHACL          {elapsed:7.2f} s  {n_files / elapsed:8.1f} docs/s")
+        for workers in counts:
+            t0 = time.perf_counter()
+            n_results = 0
+            for res in sotools.common.validateSHACLBatch(
+                shape_graph, fnames, workers=workers
+            ):
+                n_results += len(res.results)
+            elapsed = time.perf_counter() - t0
+            print(
+                f"batch workers={workers:<3}    {elapsed:7.2f} s  "
+                f"{n_files / elapsed:8.1f} docs/s  ({n_results} results)"
+            )
+
+
+if __name__ == "__main__":
+    main()
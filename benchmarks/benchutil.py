@@ -0,0 +1,34 @@
+"""
+Shared helpers for the sotools benchmark scripts.
+"""
+
+import multiprocessing
+import resource
+import time
+
+
+def _measure(q, func, args):
+    t0 = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - t0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    q.put((elapsed, rss, result))
+
+
+def measureInChild(func, *args):
+    """
+    Run ``func(*args)`` in a fresh process.
+
+    Running each measurement in its own process keeps the peak RSS of one
+    variant from hiding that of another.
+
+    Returns:
+        tuple: (wall seconds, peak RSS in KiB, return value of func)
+    """
+    ctx = multiprocessing.get_context("spawn")
+    q = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(q, func, args))
+    p.start()
+    res = q.get()
+    p.join()
+    return res
@@ -0,0 +1,196 @@
+"""
+Time and memory of each sotools stage over synthetic documents.
+
+Each profile of ``synthetic.PROFILES`` generates a corpus of JSON-LD
+documents and HTML landing pages. Every stage is run over the corpus
+``--repeat`` times, reporting the best and median time per document, then
+once more under ``tracemalloc`` for the peak memory allocated by the stage.
+Results can be saved as JSON and compared with a saved baseline, so the
+effect of a change can be measured against the previous revision.
+
+Stages:
+
+- ``extract_jsonld`` -- :func:`sotools.extractJsonLd` on the landing pages
+- ``parse`` -- :func:`sotools.loadSOGraph` on the JSON-LD text
+- ``load_html`` -- :func:`sotools.loadSOGraphFromHtml` on the landing pages
+- ``identifiers`` -- :func:`sotools.getDatasetIdentifiers`
+- ``metadata`` -- :func:`sotools.getDatasetMetadataLinks`
+- ``summary`` -- :func:`sotools.extractDatasetSummary`
+- ``subgraph`` -- :func:`sotools.getSubgraph` of each Dataset
+
+Run with::
+
+  $ python benchmarks/suite.py --save baseline.json
+  $ python benchmarks/suite.py --compare baseline.json --profiles typical,nested
+
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+
+import rdflib
+
+import sotools.common
+import synthetic
+
+# Character encoding of the landing pages of each profile, others use utf-8
+PAGE_ENCODINGS = {"sloppy": "iso-8859-1"}
+URL = "https://example.org/landing"
+
+
+class Corpus:
+    """
+    Generated documents of a profile, with graphs loaded on first use.
+    """
+
+    def __init__(self, name, n_docs):
+        self.name = name
+        self.docs = synthetic.corpus(synthetic.PROFILES[name], n_docs=n_docs)
+        self.texts = [json.dumps(d) for d in self.docs]
+        encoding = PAGE_ENCODINGS.get(name, "utf-8")
+        self.pages = [
+            synthetic.landingPage(d, n_blocks=i % 3 + 1, comments=name == "sloppy", encoding=encoding)
+            for i, d in enumerate(self.docs)
+        ]
+        self._graphs = None
+
+    @property
+    def graphs(self):
+        if self._graphs is None:
+            self._graphs = [sotools.common.loadSOGraph(data=t) for t in self.texts]
+        return self._graphs
+
+    def datasets(self):
+        for g in self.graphs:
+            for ds in g.subjects(rdflib.RDF.type, sotools.common.SO.Dataset):
+                yield g, ds
+
+
+def _extractJsonLd(c):
+    for page in c.pages:
+        sotools.common.extractJsonLd(page)
+
+
+def _parse(c):
+    for text in c.texts:
+        sotools.common.loadSOGraph(data=text)
+
+
+def _loadHtml(c):
+    for page in c.pages:
+        sotools.common.loadSOGraphFromHtml(page, URL)
+
+
+def _identifiers(c):
+    for g in c.graphs:
+        sotools.common.getDatasetIdentifiers(g)
+
+
+def _metadata(c):
+    for g in c.graphs:
+        sotools.common.getDatasetMetadataLinks(g)
+
+
+def _summary(c):
+    for g in c.graphs:
+        sotools.common.extractDatasetSummary(g)
+
+
+def _subgraph(c):
+    for g, ds in c.datasets():
+        sotools.common.getSubgraph(g, ds)
+
+
+STAGES = {
+    "extract_jsonld": _extractJsonLd,
+    "parse": _parse,
+    "load_html": _loadHtml,
+    "identifiers": _identifiers,
+    "metadata": _metadata,
+    "summary": _summary,
+    "subgraph": _subgraph,
+}
+
+
+def measure(func, corpus, repeat):
+    """
+    Time and peak allocated memory of func(corpus).
+
+    Returns:
+        dict: best and median milliseconds per document, peak KiB
+    """
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(corpus)
+        times.append(time.perf_counter() - t0)
+    tracemalloc.start()
+    func(corpus)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(corpus.docs)
+    return {
+        "best_ms": min(times) * 1000 / n,
+        "median_ms": statistics.median(times) * 1000 / n,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(profiles, stages, n_docs, repeat):
+    results = {}
+    for name in profiles:
+        corpus = Corpus(name, n_docs)
+        # Load the graphs and warm the caches outside of the measurements
+        n_triples = sum(len(g) for g in corpus.graphs)
+        results[name] = {"docs": n_docs, "triples": n_triples, "stages": {}}
+        for stage in stages:
+            results[name]["stages"][stage] = measure(STAGES[stage], corpus, repeat)
+    return results
+
+
+def report(results, baseline=None, out=sys.stdout):
+    header = f"{'profile':<12} {'stage':<15} {'best ms/doc':>12} {'median':>9} {'peak KiB':>10}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header, file=out)
+    for name, r in results.items():
+        print(f"{name:<12} {r['docs']} docs, {r['triples']} triples", file=out)
+        for stage, m in r["stages"].items():
+            line = (
+                f"{'':<12} {stage:<15} {m['best_ms']:12.3f} {m['median_ms']:9.3f}"
+                f" {m['peak_kib']:10.1f}"
+            )
+            if baseline is not None:
+                try:
+                    base = baseline[name]["stages"][stage]["best_ms"]
+                    line += f" {m['best_ms'] / base:7.2f}x"
+                except (KeyError, ZeroDivisionError):
+                    line += f" {'-':>8}"
+            print(line, file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", default=",".join(synthetic.PROFILES))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--docs", type=int, default=20, help="Documents per profile")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Write the results to a JSON file")
+    parser.add_argument("--compare", help="JSON file of baseline results")
+    args = parser.parse_args(argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    results = run(args.profiles.split(","), args.stages.split(","), args.docs, args.repeat)
+    report(results, baseline)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Generator of synthetic schema.org Dataset documents for the benchmarks.
+
+The documents follow the patterns of the examples in
+``docsource/source/examples/data``: literal and structured identifiers,
+metadata links through ``encoding``, ``subjectOf`` and ``about``, and the
+variants of the schema.org namespace seen in the wild. Each document is
+built from a seeded ``random.Random`` so runs are repeatable.
+
+Example::
+
+  import synthetic
+  docs = synthetic.corpus(synthetic.PROFILES["typical"], n_docs=100)
+  html = synthetic.landingPage(docs[0])
+
+"""
+import json
+import random
+
+# Variants of the schema.org namespace as @vocab, all normalized by sotools
+VOCABS = [
+    "https://schema.org/",
+    "https://schema.org",
+    "http://schema.org/",
+    "http://schema.org",
+]
+
+ENCODING_FORMATS = [
+    "http://www.isotc211.org/2005/gmd",
+    "http://www.isotc211.org/2005/gmd-noaa",
+    "eml://ecoinformatics.org/eml-2.1.1",
+    "http://ns.dataone.org/metadata/schema/onedcx/v1.0",
+]
+
+WORDS = (
+    "ocean temperature salinity profile cruise station sample sediment core "
+    "chlorophyll nitrate mooring buoy survey transect depth pressure oxygen"
+).split()
+
+# Parameters of a generated document, see :func:`datasetJsonLd`
+PROFILES = {
+    "minimal": dict(n_datasets=1, n_identifiers=1, n_links=0, depth=0, text=1),
+    "typical": dict(n_datasets=1, n_identifiers=2, n_links=2, depth=1, text=4),
+    "nested": dict(n_datasets=1, n_identifiers=2, n_links=2, depth=6, text=4),
+    "identifiers": dict(n_datasets=1, n_identifiers=40, n_links=1, depth=1, text=2),
+    "links": dict(n_datasets=1, n_identifiers=1, n_links=40, depth=1, text=2),
+    "catalog": dict(n_datasets=200, n_identifiers=2, n_links=1, depth=1, text=2),
+    "sloppy": dict(
+        n_datasets=1, n_identifiers=4, n_links=4, depth=2, text=4, sloppiness=1.0
+    ),
+}
+
+
+def _text(rng, n_sentences):
+    return " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(12)).capitalize() + "."
+        for _ in range(n_sentences)
+    )
+
+
+def _identifier(rng, base, i, sloppy):
+    doi = f"10.5072/{base.rsplit('/', 1)[-1]}.{i}"
+    if rng.random() < 0.3:
+        return f"https://doi.org/{doi}"
+    return {
+        "@type": ["PropertyValue", "datacite:ResourceIdentifier"],
+        "propertyId" if sloppy else "propertyID": "DOI",
+        "url": f"https://doi.org/{doi}",
+        "value": doi,
+    }
+
+
+def _metadataLink(rng, base, i, pattern):
+    link = {
+        "@id": f"{base}/metadata/{i}.xml",
+        "@type": "MediaObject" if pattern != "subjectOf" else "CreativeWork",
+        "contentUrl": f"{base}/metadata/{i}.xml",
+        "encodingFormat": rng.choice(ENCODING_FORMATS),
+        "dateModified": f"2019-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "description": "Metadata document describing the Dataset",
+    }
+    if pattern == "subjectOf":
+        link["url"] = link.pop("contentUrl")
+    return link
+
+
+def _parts(rng, base, depth, text):
+    # A chain of hasPart, depth levels deep, as in nested collections
+    if depth <= 0:
+        return None
+    part = {
+        "@id": f"{base}/part",
+        "@type": "Dataset",
+        "name": f"Part of {base}",
+        "description": _text(rng, text),
+    }
+    child = _parts(rng, f"{base}/part", depth - 1, text)
+    if child is not None:
+        part["hasPart"] = child
+    return part
+
+
+def datasetJsonLd(
+    seed=0,
+    n_datasets=1,
+    n_identifiers=2,
+    n_links=2,
+    depth=1,
+    text=4,
+    sloppiness=0.2,
+    base="https://example.org/dataset",
+    vocab=None,
+):
+    """
+    Build a JSON-LD document describing one or more Datasets.
+
+    Args:
+        seed (integer): Seed of the random choices
+        n_datasets (integer): Number of Datasets, more than one makes a DataCatalog
+        n_identifiers (integer): Identifiers per Dataset, literal or PropertyValue
+        n_links (integer): Metadata links per Dataset, through encoding,
+          subjectOf or about
+        depth (integer): Levels of nested hasPart Datasets
+        text (integer): Sentences in each description
+        sloppiness (float): Probability of a sloppy namespace or term case
+        base (string): Base of the generated node identifiers
+        vocab (string): Value of ``@vocab``, by default a variant of the
+          schema.org namespace chosen as for the term case
+
+    Returns:
+        dict: JSON-LD document
+    """
+    rng = random.Random(seed)
+    sloppy = rng.random() < sloppiness
+    if vocab is None:
+        vocab = rng.choice(VOCABS[1:]) if sloppy else VOCABS[0]
+    graph = []
+    for d in range(n_datasets):
+        ds_id = f"{base}/{seed}-{d}"
+        pattern = rng.choice(["encoding", "subjectOf", "about"])
+        ds = {
+            "@id": ds_id,
+            "@type": "dataset" if sloppy and rng.random() < 0.5 else "Dataset",
+            "name": f"Dataset {seed}-{d}",
+            "description": _text(rng, text),
+            "license": "https://creativecommons.org/publicdomain/zero/1.0/",
+            "identifier": [
+                _identifier(rng, ds_id, i, sloppy) for i in range(n_identifiers)
+            ],
+            "keywords": rng.sample(WORDS, 5),
+        }
+        links = [_metadataLink(rng, ds_id, i, pattern) for i in range(n_links)]
+        if pattern == "about":
+            for link in links:
+                link["about"] = {"@id": ds_id}
+            graph.extend(links)
+        elif links:
+            ds[pattern] = links
+        parts = _parts(rng, ds_id, depth, text)
+        if parts is not None:
+            ds["hasPart"] = parts
+        graph.append(ds)
+    context = {"@vocab": vocab, "datacite": "http://purl.org/spar/datacite/"}
+    if n_datasets > 1:
+        return {
+            "@context": context,
+            "@graph": [
+                {
+                    "@id": f"{base}/catalog/{seed}",
+                    "@type": "DataCatalog",
+                    "dataset": [{"@id": g["@id"]} for g in graph if "name" in g],
+                }
+            ]
+            + graph,
+        }
+    return {"@context": context, "@graph": graph}
+
+
+def landingPage(doc, n_blocks=1, comments=False, encoding="utf-8"):
+    """
+    Render a JSON-LD document in an HTML landing page.
+
+    The @graph is spread over n_blocks script elements, surrounded by
+    unrelated markup and scripts, as in ``ds_landing_page.html``.
+
+    Args:
+        doc (dict): JSON-LD document from :func:`datasetJsonLd`
+        n_blocks (integer): Number of ``application/ld+json`` blocks
+        comments (boolean): Prefix each block with an HTML comment line
+        encoding (string): Encoding of the returned bytes
+
+    Returns:
+        bytes: HTML text
+    """
+    graph = doc["@graph"]
+    n_blocks = max(1, min(n_blocks, len(graph)))
+    blocks = []
+    for i in range(n_blocks):
+        part = {"@context": doc["@context"], "@graph": graph[i::n_blocks]}
+        text = json.dumps(part, indent=2, ensure_ascii=False)
+        if comments:
+            text = "<!-- generated -->\n" + text
+        blocks.append(f'<script type="application/ld+json">\n{text}\n</script>')
+    filler = "\n".join(
+        f"<p>{' '.join(WORDS[(i + j) % len(WORDS)] for j in range(30))}</p>"
+        for i in range(20)
+    )
+    page = (
+        "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n"
+        f'<meta charset="{encoding}">\n<title>Dataset landing page</title>\n'
+        + blocks[0]
+        + '\n<script type="text/javascript">var notJsonLd = {"@type": "Dataset"};</script>\n'
+        "</head>\n<body>\n<h1>Dataset</h1>\n"
+        + filler
+        + "\n"
+        + "\n".join(blocks[1:])
+        + "\n</body>\n</html>\n"
+    )
+    return page.encode(encoding, errors="xmlcharrefreplace")
+
+
+def corpus(profile, n_docs=100, seed=0):
+    """
+    Generate n_docs JSON-LD documents with the parameters of a profile.
+
+    Args:
+        profile (dict): Keyword arguments of :func:`datasetJsonLd`, e.g. from PROFILES
+        n_docs (integer): Number of documents
+        seed (integer): Seed of the first document
+
+    Returns:
+        list: JSON-LD documents
+    """
+    return [datasetJsonLd(seed=seed + i, **profile) for i in range(n_docs)]
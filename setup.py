@@ -11,7 +11,7 @@ kwargs = {
     'packages': find_packages(),
     'package_data': {'sotools': ['data/data/*.jsonld', 'data/shapes/*.jsonld', 'data/shapes/*.ttl']},
     'install_requires': [
-        'rdflib','rdflib-jsonld'
+        'rdflib>=6','urllib3>=1.26'
     ],
     'classifiers': [
         'Development Status :: 4 - Beta',
@@ -26,6 +26,7 @@ kwargs = {
     ),
     'entry_points': {
         'console_scripts': [
+            'sotools=sotools.cli:main',
         ],
     }
 }
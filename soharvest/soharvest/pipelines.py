@@ -5,7 +5,324 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import concurrent.futures
+import gzip
+import json
+import multiprocessing
+import os
+import time
+import sotools
+from soharvest.state import HarvestState
+from twisted.internet import defer, reactor, task
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+# HarvestState of a parse worker process, for reading the digest index
+_state = None
+
+
+def _workerState(path):
+    global _state
+    if _state is None or _state.path != path:
+        _state = HarvestState(path)
+    return _state
+
+
+def parseLandingPage(body, url, ntriples=False, state_path=None):
+    """
+    Identifiers and metadata links of the Datasets in an HTML landing page
+
+    Runs in a worker process of :class:`SOParsePipeline`. With ntriples the
+    page graph is also returned, serialized as N-Triples. With state_path,
+    the digest of the JSON-LD is looked up in the harvest state and when
+    it was seen before the recorded summary is returned with
+    ``duplicate_of`` set to the page it was first extracted from. The
+    graph of a duplicate is still parsed when ntriples is set, so that
+    every page has its named graph in the N-Quads output.
+    """
+    items = sotools.extractJsonLd(body)
+    digest = None
+    if state_path is not None and len(items) > 0:
+        digest = sotools.jsonLdDigest(items, base=url)
+        seen = _workerState(state_path).getDigest(digest)
+        if seen is not None:
+            res = dict(seen["summary"])
+            res["jsonld_digest"] = digest
+            res["duplicate_of"] = seen["source"]
+            if ntriples:
+                g = sotools.loadSOGraph(data=items, publicID=url)
+                res["ntriples"] = g.serialize(format="nt")
+            return res
+    g = sotools.loadSOGraph(data=items, publicID=url)
+    res = sotools.extractDatasetSummary(g)
+    res["jsonld_digest"] = digest
+    if ntriples:
+        res["ntriples"] = g.serialize(format="nt")
+    return res
+
+
+class SOParsePipeline(object):
+    """
+    Parse the raw pages yielded by the spider in a pool of processes
+
+    Items with a ``body`` are replaced by ``{source, identifiers, metadata}``
+    once the page has been parsed in a worker process, so RDF parsing does
+    not block the reactor and downloads continue while pages are parsed.
+    Scrapy keeps a response active until its items are processed, so the
+    downloader backs off once the responses waiting to be parsed exceed
+    the scraper's active size limit.
+
+    When the spider keeps a harvest state, pages whose JSON-LD was seen
+    before, e.g. on a mirror or under another URL, are emitted with the
+    earlier summary and ``duplicate_of``. They are not parsed again unless
+    ``SOHARVEST_NQUADS`` is set, in which case only the Dataset extraction
+    is skipped.
+
+    Settings:
+        SOHARVEST_PARSE_WORKERS: Number of worker processes, defaults to the number of CPUs
+        SOHARVEST_NQUADS: Also return the page graph as ``ntriples``, for N-Quads output
+    """
+
+    def __init__(self, workers=None, ntriples=False):
+        self.workers = workers
+        self.ntriples = ntriples
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            workers=crawler.settings.getint("SOHARVEST_PARSE_WORKERS") or None,
+            ntriples=crawler.settings.getbool("SOHARVEST_NQUADS"),
+        )
+
+    def open_spider(self, spider):
+        # spawn, as forking the process running the reactor is unsafe
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def close_spider(self, spider):
+        self.executor.shutdown(wait=True)
+
+    def process_item(self, item, spider):
+        if "body" not in item:
+            return item
+        d = defer.Deferred()
+        state = getattr(spider, "state", None)
+        future = self.executor.submit(
+            parseLandingPage,
+            item["body"],
+            item["source"],
+            self.ntriples,
+            None if state is None else state.path,
+        )
+        future.add_done_callback(lambda f: reactor.callFromThread(self._parsed, d, f))
+        d.addCallback(self._summary, item, spider)
+        return d
+
+    def _parsed(self, d, future):
+        try:
+            summary = future.result()
+        except Exception as e:
+            d.errback(e)
+            return
+        d.callback(summary)
+
+    def _summary(self, summary, item, spider):
+        digest = summary.pop("jsonld_digest")
+        if getattr(spider, "state", None) is not None:
+            page_summary = {
+                "identifiers": summary["identifiers"],
+                "metadata": summary["metadata"],
+            }
+            spider.state.update(
+                item["loc"],
+                lastmod=item.get("lastmod"),
+                etag=item.get("etag"),
+                content_hash=item.get("content_hash"),
+                summary=page_summary,
+            )
+            if digest is not None and "duplicate_of" not in summary:
+                spider.state.addDigest(digest, item["source"], page_summary)
+        res = {"source": item["source"]}
+        res.update(summary)
+        return res
+
 
 class SoharvestPipeline(object):
+    """
+    Write harvested items to rotating, compressed files in batches
+
+    Items are buffered and written when ``SOHARVEST_BATCH_SIZE`` items are
+    waiting or ``SOHARVEST_FLUSH_INTERVAL`` seconds have passed, whichever
+    comes first. A new file is started after ``SOHARVEST_FILE_ITEMS`` items.
+    Output is gzip compressed JSON Lines, or Parquet when
+    ``SOHARVEST_OUTPUT_FORMAT`` is ``parquet`` (requires pyarrow). With
+    ``SOHARVEST_NQUADS`` the page graphs are also written as gzip compressed
+    N-Quads, with one named graph per source URL.
+
+    Settings:
+        SOHARVEST_OUTPUT_DIR: Folder for the output files, default "harvest"
+        SOHARVEST_OUTPUT_FORMAT: "jsonl" (default) or "parquet"
+        SOHARVEST_BATCH_SIZE: Items buffered before writing, default 1000
+        SOHARVEST_FLUSH_INTERVAL: Maximum seconds between writes, default 60,
+            0 to write only when a batch is full
+        SOHARVEST_FILE_ITEMS: Items per output file, default 100000
+        SOHARVEST_NQUADS: Write the page graphs as N-Quads, default False
+    """
+
+    def __init__(
+        self,
+        output_dir="harvest",
+        output_format="jsonl",
+        batch_size=1000,
+        flush_interval=60,
+        file_items=100000,
+        nquads=False,
+    ):
+        if output_format not in ("jsonl", "parquet"):
+            raise ValueError(f"Unknown output format: {output_format}")
+        if output_format == "parquet" and pyarrow is None:
+            raise ImportError("Parquet output requires pyarrow")
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.file_items = file_items
+        self.nquads = nquads
+        self._items = []
+        self._file = None
+        self._quads = None
+        self._file_count = 0
+        self._file_index = 0
+        self._flushed = time.monotonic()
+        self._timer = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            output_dir=settings.get("SOHARVEST_OUTPUT_DIR", "harvest"),
+            output_format=settings.get("SOHARVEST_OUTPUT_FORMAT", "jsonl"),
+            batch_size=settings.getint("SOHARVEST_BATCH_SIZE", 1000),
+            flush_interval=settings.getfloat("SOHARVEST_FLUSH_INTERVAL", 60),
+            file_items=settings.getint("SOHARVEST_FILE_ITEMS", 100000),
+            nquads=settings.getbool("SOHARVEST_NQUADS"),
+        )
+
+    def open_spider(self, spider):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._prefix = f"{spider.name}-{time.strftime('%Y%m%dT%H%M%S')}"
+        if self.flush_interval > 0:
+            self._timer = task.LoopingCall(self._flushIfDue)
+            self._timer.start(min(self.flush_interval, 10), now=False)
+
+    def close_spider(self, spider):
+        if self._timer is not None and self._timer.running:
+            self._timer.stop()
+        self.flush()
+        self._close()
+
     def process_item(self, item, spider):
+        self._items.append(item)
+        if len(self._items) >= self.batch_size:
+            self.flush()
         return item
+
+    def _flushIfDue(self):
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def _path(self, extension):
+        return os.path.join(
+            self.output_dir, f"{self._prefix}-{self._file_index:05d}.{extension}"
+        )
+
+    def _open(self):
+        if self.output_format == "parquet":
+            self._file = None
+        else:
+            self._file = gzip.open(self._path("jsonl.gz"), "wt", encoding="utf-8")
+        if self.nquads:
+            self._quads = gzip.open(self._path("nq.gz"), "wt", encoding="utf-8")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._quads is not None:
+            self._quads.close()
+        self._file = None
+        self._quads = None
+        self._file_count = 0
+        self._file_index += 1
+
+    def flush(self):
+        """
+        Write the buffered items, starting new files as needed
+        """
+        self._flushed = time.monotonic()
+        items = self._items
+        self._items = []
+        while len(items) > 0:
+            if self._file_count == 0:
+                self._open()
+            n = min(len(items), self.file_items - self._file_count)
+            self._write(items[:n])
+            items = items[n:]
+            self._file_count += n
+            if self._file_count >= self.file_items:
+                self._close()
+
+    def _write(self, items):
+        records = []
+        for item in items:
+            record = dict(item)
+            ntriples = record.pop("ntriples", None)
+            records.append(record)
+            if self._quads is not None and ntriples is not None:
+                self._quads.write(_namedGraph(ntriples, record["source"]))
+        if self.output_format == "parquet":
+            table = pyarrow.table(
+                {
+                    "source": [r["source"] for r in records],
+                    "identifiers": [json.dumps(r.get("identifiers")) for r in records],
+                    "metadata": [json.dumps(r.get("metadata")) for r in records],
+                    "duplicate_of": [r.get("duplicate_of") for r in records],
+                },
+                schema=pyarrow.schema(
+                    [
+                        ("source", pyarrow.string()),
+                        ("identifiers", pyarrow.string()),
+                        ("metadata", pyarrow.string()),
+                        ("duplicate_of", pyarrow.string()),
+                    ]
+                ),
+            )
+            if self._file is None:
+                self._file = pyarrow.parquet.ParquetWriter(
+                    self._path("parquet"), table.schema, compression="zstd"
+                )
+            self._file.write_table(table)
+        else:
+            self._file.write(
+                "".join(json.dumps(r, default=str) + "\n" for r in records)
+            )
+
+
+def _namedGraph(ntriples, name):
+    """
+    N-Quads placing the N-Triples statements in the graph name
+    """
+    graph = f" <{name}> .\n"
+    lines = []
+    # Not splitlines, literals may contain e.g. U+0085 or U+2028 unescaped
+    for line in ntriples.split("\n"):
+        line = line.rstrip()
+        if line.endswith("."):
+            lines.append(line[:-1].rstrip() + graph)
+    return "".join(lines)
@@ -64,9 +64,21 @@ ROBOTSTXT_OBEY = True
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    'soharvest.pipelines.SoharvestPipeline': 300,
-#}
+ITEM_PIPELINES = {
+    'soharvest.pipelines.SOParsePipeline': 100,
+    'soharvest.pipelines.SoharvestPipeline': 300,
+}
+
+# Number of processes parsing pages, defaults to the number of CPUs
+#SOHARVEST_PARSE_WORKERS = 4
+
+# Harvest output, see soharvest.pipelines.SoharvestPipeline
+#SOHARVEST_OUTPUT_DIR = 'harvest'
+#SOHARVEST_OUTPUT_FORMAT = 'jsonl'
+#SOHARVEST_BATCH_SIZE = 1000
+#SOHARVEST_FLUSH_INTERVAL = 60
+#SOHARVEST_FILE_ITEMS = 100000
+#SOHARVEST_NQUADS = False
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
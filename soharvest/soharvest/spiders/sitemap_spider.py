@@ -1,36 +1,89 @@
-from scrapy.spiders import SitemapSpider
-import sotools
-from pprint import pprint
+'''
+Spider harvesting schema.org Dataset descriptions listed in a sitemap
 
+The sitemap ``lastmod`` of each page is passed along in the request meta
+and recorded in the optional harvest state (see soharvest.state), so a
+re-harvest only requests new and changed pages.
 
-'''
 TODO:
-- get date modified from sitemap
 - generate system metadata
-- preserve state to enable efficient re-harvest
 '''
+from scrapy.spiders import SitemapSpider
+from w3lib.url import safe_url_string
+from soharvest.state import HarvestState, contentHash
+
+
 class SOBaseSpider(SitemapSpider):
+    """
+    Harvest schema.org Dataset descriptions from the pages of a sitemap
+
+    With a state database (``scrapy crawl sobase -a state=harvest.sqlite``)
+    only sitemap entries that are new or have a changed ``lastmod`` are
+    requested, and pages with an unchanged body are not parsed again.
+    """
     name = "sobase"
     sitemap_urls = ["https://www.archive.arm.gov/metadata/adc/sitemap.xml"]
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, state=None, **kwargs):
         super(SOBaseSpider, self).__init__(*args, **kwargs)
+        self.state = None
+        if state is not None:
+            self.state = HarvestState(state)
+        self._lastmod = {}
+
+    def sitemap_filter(self, entries):
+        for entry in entries:
+            url = entry["loc"]
+            lastmod = entry.get("lastmod")
+            if self.state is not None and not self.state.changed(url, lastmod):
+                self.logger.debug(f"Unchanged since last harvest: {url}")
+                continue
+            if lastmod is not None:
+                self._lastmod[url] = lastmod
+            yield entry
+
+    def _parse_sitemap(self, response):
+        # sitemap_filter records the lastmod of the entries of this sitemap,
+        # which is moved to the meta of their requests. Redirects keep the
+        # meta, and nothing is left behind for entries that are filtered
+        # out, match no rule or whose request fails.
+        requests = list(super(SOBaseSpider, self)._parse_sitemap(response))
+        lastmod = {safe_url_string(url): v for url, v in self._lastmod.items()}
+        self._lastmod = {}
+        for request in requests:
+            if request.url in lastmod:
+                request.meta["lastmod"] = lastmod[request.url]
+        return requests
+
+    def closed(self, reason):
+        if self.state is not None:
+            self.state.close()
 
     def parse(self, response):
-        g = None
-        try:
-            g = sotools.loadSOGraphFromHtml(response.body, response.url)
-        except Exception as e:
-            self.logger.warning(e)
-        self.logger.info(f"response url = {response.url} has a Dataset = {sotools.isDataset(g)}")
-        identifiers = sotools.getDatasetIdentifiers(g)
-        print(str(identifiers))
-        metadata = sotools.getDatasetMetadataLinks(g)
-        res = {
+        # State is kept for the sitemap location, before any redirects
+        loc = response.meta.get("redirect_urls", [response.url])[0]
+        lastmod = response.meta.get("lastmod")
+        body_hash = None
+        if self.state is not None:
+            body_hash = contentHash(response.body)
+            previous = self.state.get(loc)
+            if previous is not None and previous["content_hash"] == body_hash:
+                self.logger.info(f"response url = {response.url} content unchanged")
+                self.state.update(
+                    loc,
+                    lastmod=lastmod,
+                    etag=previous["etag"],
+                    content_hash=body_hash,
+                    summary=previous["summary"],
+                )
+                return
+        # Parsed by soharvest.pipelines.SOParsePipeline
+        etag = response.headers.get("ETag")
+        yield {
             "source": response.url,
-            "identifiers": identifiers,
-            "metadata": metadata
+            "loc": loc,
+            "body": response.body,
+            "lastmod": lastmod,
+            "etag": None if etag is None else etag.decode("latin-1"),
+            "content_hash": body_hash,
         }
-        yield res
-        #for identifier in identifiers:
-        #    yield identifier
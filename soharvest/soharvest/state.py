@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+# Persistent harvest state, used to skip pages that have not changed since
+# the previous harvest.
+
+import hashlib
+import json
+import sqlite3
+import time
+
+
+def contentHash(body):
+    """
+    SHA-256 hex digest of a response body
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class HarvestState(object):
+    """
+    SQLite store of what was harvested from each URL
+
+    For each URL the sitemap ``lastmod``, the response ``ETag``, a hash of
+    the response body and the summary extracted from the page are recorded.
+    A sitemap entry is harvested again only when it is new or its
+    ``lastmod`` differs from the recorded value.
+
+    The summary extracted from each distinct set of JSON-LD blocks is also
+    recorded under the digest of the blocks (see ``sotools.jsonLdDigest``),
+    so pages repeating content seen before need not be parsed.
+
+    Args:
+        path (string): SQLite database file, created if necessary
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS page (
+                url TEXT PRIMARY KEY,
+                lastmod TEXT,
+                etag TEXT,
+                content_hash TEXT,
+                summary TEXT,
+                harvested REAL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS jsonld (
+                digest TEXT PRIMARY KEY,
+                source TEXT,
+                summary TEXT
+            )"""
+        )
+        self._db.commit()
+
+    def get(self, url):
+        """
+        Recorded state of url
+
+        Returns:
+            dict: lastmod, etag, content_hash, summary and harvested, or None
+        """
+        row = self._db.execute(
+            "SELECT lastmod, etag, content_hash, summary, harvested FROM page WHERE url=?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "lastmod": row[0],
+            "etag": row[1],
+            "content_hash": row[2],
+            "summary": None if row[3] is None else json.loads(row[3]),
+            "harvested": row[4],
+        }
+
+    def changed(self, url, lastmod=None):
+        """
+        True if url should be harvested for a sitemap entry with lastmod
+
+        URLs that were not harvested before, and entries without a
+        ``lastmod`` on either side, are always treated as changed.
+        """
+        row = self._db.execute(
+            "SELECT lastmod FROM page WHERE url=?", (url,)
+        ).fetchone()
+        if row is None or row[0] is None or lastmod is None:
+            return True
+        return row[0] != lastmod
+
+    def update(self, url, lastmod=None, etag=None, content_hash=None, summary=None):
+        """
+        Record the harvest of url
+        """
+        self._db.execute(
+            "INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                lastmod,
+                etag,
+                content_hash,
+                None if summary is None else json.dumps(summary),
+                time.time(),
+            ),
+        )
+        self._db.commit()
+
+    def getDigest(self, digest):
+        """
+        Source and summary of the page first seen with JSON-LD digest
+
+        Returns:
+            dict: source and summary, or None
+        """
+        row = self._db.execute(
+            "SELECT source, summary FROM jsonld WHERE digest=?", (digest,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"source": row[0], "summary": json.loads(row[1])}
+
+    def addDigest(self, digest, source, summary):
+        """
+        Record the summary extracted from the JSON-LD with digest, keeping the first source
+        """
+        self._db.execute(
+            "INSERT OR IGNORE INTO jsonld VALUES (?, ?, ?)",
+            (digest, source, json.dumps(summary)),
+        )
+        self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM page").fetchone()[0]
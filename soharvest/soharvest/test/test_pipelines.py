@@ -0,0 +1,305 @@
+"""
+Tests for the soharvest item pipelines
+
+Run with::
+
+  $ pytest
+
+"""
+import concurrent.futures
+import glob
+import gzip
+import json
+import os.path
+import pytest
+
+pytest.importorskip("scrapy")
+
+import rdflib
+import soharvest.pipelines
+from soharvest.pipelines import SOParsePipeline, SoharvestPipeline, parseLandingPage
+from soharvest.state import HarvestState, contentHash
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../../docsource/source/examples/data/"
+)
+URL = "https://example.org/dataset/1"
+
+
+class Spider:
+    name = "test"
+
+    def __init__(self, state=None):
+        self.state = state
+
+
+def landingPage():
+    with open(os.path.join(test_data_folder, "ds_landing_page.html"), "rb") as f:
+        return f.read()
+
+
+class TestParseLandingPage:
+    def test_summary(self):
+        res = parseLandingPage(landingPage(), URL)
+        assert [i["value"] for i in res["identifiers"]] == ["10.5072/example.1"]
+        assert [m["contentUrl"] for m in res["metadata"]] == [
+            "https://example.org/dataset/1/metadata.xml"
+        ]
+        assert res["jsonld_digest"] is None
+        assert "ntriples" not in res
+        assert "duplicate_of" not in res
+
+    def test_ntriples(self):
+        res = parseLandingPage(landingPage(), URL, ntriples=True)
+        g = rdflib.Graph()
+        g.parse(data=res["ntriples"], format="nt")
+        assert len(g) == 12
+        assert (
+            rdflib.URIRef(URL),
+            rdflib.RDF.type,
+            rdflib.URIRef("https://schema.org/Dataset"),
+        ) in g
+        assert len(res["identifiers"]) == 1
+
+
+class TestSOParsePipeline:
+    def test_summary(self, tmp_path):
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        body = landingPage()
+        item = {
+            "source": URL,
+            "loc": URL,
+            "body": body,
+            "lastmod": "2020-01-01",
+            "etag": None,
+            "content_hash": contentHash(body),
+        }
+        # As returned from the worker process
+        summary = parseLandingPage(body, URL, state_path=state.path)
+        res = SOParsePipeline()._summary(summary, item, Spider(state))
+        assert set(res) == {"source", "identifiers", "metadata"}
+        recorded = state.get(URL)
+        assert recorded["lastmod"] == "2020-01-01"
+        assert recorded["content_hash"] == contentHash(body)
+        assert recorded["summary"]["identifiers"] == res["identifiers"]
+        state.close()
+
+
+class DirectReactor:
+    # Runs the calls scheduled from the executor immediately
+    def callFromThread(self, f, *args, **kwargs):
+        f(*args, **kwargs)
+
+
+class InlineExecutor:
+    # Runs the parse in the calling thread, which owns the SQLite state
+    def submit(self, fn, *args):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def processItem(pipeline, item, spider):
+    """
+    Result of pipeline.process_item(item), parsed by an InlineExecutor
+    """
+    results = []
+    pipeline.executor = InlineExecutor()
+    d = pipeline.process_item(item, spider)
+    d.addBoth(results.append)
+    return results[0]
+
+
+class TestProcessItem:
+    def test_parsed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(soharvest.pipelines, "reactor", DirectReactor())
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        body = landingPage()
+        item = {
+            "source": URL,
+            "loc": URL,
+            "body": body,
+            "lastmod": "2020-01-01",
+            "etag": '"abc"',
+            "content_hash": contentHash(body),
+        }
+        res = processItem(SOParsePipeline(), item, Spider(state))
+        assert res["source"] == URL
+        assert [i["value"] for i in res["identifiers"]] == ["10.5072/example.1"]
+        assert len(res["metadata"]) == 1
+        assert "body" not in res
+        recorded = state.get(URL)
+        assert recorded["etag"] == '"abc"'
+        assert recorded["summary"]["identifiers"] == res["identifiers"]
+        # Items without a body are passed through
+        assert SOParsePipeline().process_item(res, Spider(state)) is res
+        state.close()
+
+    def test_failed(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(soharvest.pipelines, "reactor", DirectReactor())
+
+        def failing(*args):
+            raise ValueError("parse failed")
+
+        monkeypatch.setattr(soharvest.pipelines, "parseLandingPage", failing)
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        item = {"source": URL, "loc": URL, "body": b"<html></html>"}
+        res = processItem(SOParsePipeline(), item, Spider(state))
+        assert res.check(ValueError)
+        assert state.get(URL) is None
+        state.close()
+
+
+class TestDuplicates:
+    def test_digest(self, tmp_path):
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        body = landingPage()
+        first = parseLandingPage(body, URL, state_path=state.path)
+        assert first["jsonld_digest"] is not None
+        assert "duplicate_of" not in first
+        item = {"source": URL, "loc": URL}
+        SOParsePipeline()._summary(dict(first), item, Spider(state))
+
+        mirror = "https://mirror.example.org/dataset/1"
+        second = parseLandingPage(body, mirror, state_path=state.path)
+        assert second["duplicate_of"] == URL
+        assert second["jsonld_digest"] == first["jsonld_digest"]
+        assert second["identifiers"] == first["identifiers"]
+        assert "ntriples" not in second
+
+        # The graph is still serialized for the N-Quads output
+        with_graph = parseLandingPage(body, mirror, ntriples=True, state_path=state.path)
+        assert with_graph["duplicate_of"] == URL
+        g = rdflib.Graph()
+        g.parse(data=with_graph["ntriples"], format="nt")
+        assert len(g) == 12
+        state.close()
+
+    def test_relative(self, tmp_path):
+        # ds_m_about.json identifies its nodes relative to the page URL
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        with open(os.path.join(test_data_folder, "ds_m_about.json"), "rb") as f:
+            body = b'<script type="application/ld+json">' + f.read() + b"</script>"
+        first = parseLandingPage(body, URL + "/", state_path=state.path)
+        SOParsePipeline()._summary(
+            dict(first), {"source": URL + "/", "loc": URL + "/"}, Spider(state)
+        )
+        other = "https://example.org/dataset/2/"
+        res = parseLandingPage(body, other, state_path=state.path)
+        assert "duplicate_of" not in res
+        assert res["metadata"][0]["subjectOf"] == other
+        state.close()
+
+    def test_changed(self, tmp_path):
+        state = HarvestState(str(tmp_path / "state.sqlite"))
+        body = landingPage()
+        first = parseLandingPage(body, URL, state_path=state.path)
+        SOParsePipeline()._summary(dict(first), {"source": URL, "loc": URL}, Spider(state))
+        changed = body.replace(b"Example dataset", b"Changed dataset")
+        res = parseLandingPage(changed, URL + "/2", state_path=state.path)
+        assert "duplicate_of" not in res
+        assert res["jsonld_digest"] != first["jsonld_digest"]
+        state.close()
+
+
+def harvestItems(n):
+    return [
+        {
+            "source": f"https://example.org/dataset/{i}",
+            "identifiers": [{"value": f"ds-{i}"}],
+            "metadata": [],
+            "ntriples": f'<https://example.org/dataset/{i}> <https://schema.org/name> "{i}" .\n',
+        }
+        for i in range(n)
+    ]
+
+
+def writeItems(pipeline, items):
+    spider = Spider()
+    pipeline.open_spider(spider)
+    for item in items:
+        pipeline.process_item(item, spider)
+    pipeline.close_spider(spider)
+
+
+class TestSoharvestPipeline:
+    def test_jsonl(self, tmp_path):
+        pipeline = SoharvestPipeline(
+            output_dir=str(tmp_path), batch_size=2, file_items=3, nquads=True
+        )
+        writeItems(pipeline, harvestItems(7))
+        files = sorted(glob.glob(str(tmp_path / "*.jsonl.gz")))
+        records = []
+        for fname in files:
+            with gzip.open(fname, "rt", encoding="utf-8") as f:
+                records.append([json.loads(line) for line in f])
+        assert [len(r) for r in records] == [3, 3, 1]
+        sources = [r["source"] for file_records in records for r in file_records]
+        assert sources == [item["source"] for item in harvestItems(7)]
+        assert "ntriples" not in records[0][0]
+
+        graphs = rdflib.Dataset()
+        quad_files = sorted(glob.glob(str(tmp_path / "*.nq.gz")))
+        assert len(quad_files) == 3
+        for fname in quad_files:
+            with gzip.open(fname, "rt", encoding="utf-8") as f:
+                graphs.parse(data=f.read(), format="nquads")
+        names = {str(c.identifier) for c in graphs.contexts()} - {
+            str(rdflib.graph.DATASET_DEFAULT_GRAPH_ID)
+        }
+        assert names == set(sources)
+        g = graphs.graph(rdflib.URIRef(sources[4]))
+        assert len(g) == 1
+
+    def test_lineSeparators(self, tmp_path):
+        g = rdflib.Graph()
+        page = rdflib.URIRef("https://example.org/page")
+        text = "first\x85second\u2028third\u2029fourth"
+        g.add((page, rdflib.URIRef("https://schema.org/name"), rdflib.Literal(text)))
+        item = {"source": str(page), "ntriples": g.serialize(format="nt")}
+        pipeline = SoharvestPipeline(output_dir=str(tmp_path), nquads=True)
+        writeItems(pipeline, [item])
+        (fname,) = glob.glob(str(tmp_path / "*.nq.gz"))
+        graphs = rdflib.Dataset()
+        with gzip.open(fname, "rt", encoding="utf-8", newline="") as f:
+            graphs.parse(data=f.read(), format="nquads")
+        assert list(graphs.graph(page).objects()) == [rdflib.Literal(text)]
+
+    def test_flushInterval(self, tmp_path):
+        # No timer, items are written when a batch is full and at the end
+        pipeline = SoharvestPipeline(
+            output_dir=str(tmp_path), batch_size=4, flush_interval=0
+        )
+        spider = Spider()
+        pipeline.open_spider(spider)
+        assert pipeline._timer is None
+        for item in harvestItems(5):
+            pipeline.process_item(item, spider)
+        assert len(pipeline._items) == 1
+        pipeline.close_spider(spider)
+        (fname,) = glob.glob(str(tmp_path / "*.jsonl.gz"))
+        with gzip.open(fname, "rt", encoding="utf-8") as f:
+            assert len(f.readlines()) == 5
+
+    def test_parquet(self, tmp_path):
+        pyarrow = pytest.importorskip("pyarrow")
+        import pyarrow.parquet
+
+        items = harvestItems(5)
+        items[3]["duplicate_of"] = items[0]["source"]
+        pipeline = SoharvestPipeline(
+            output_dir=str(tmp_path), output_format="parquet", batch_size=2, file_items=4
+        )
+        writeItems(pipeline, items)
+        files = sorted(glob.glob(str(tmp_path / "*.parquet")))
+        tables = [pyarrow.parquet.read_table(f) for f in files]
+        assert [t.num_rows for t in tables] == [4, 1]
+        rows = tables[0].to_pylist()
+        assert rows[3]["duplicate_of"] == items[0]["source"]
+        assert json.loads(rows[1]["identifiers"]) == items[1]["identifiers"]
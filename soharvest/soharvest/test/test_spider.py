@@ -0,0 +1,61 @@
+"""
+Tests for the sitemap spider
+
+Run with::
+
+  $ pytest
+
+"""
+import pytest
+
+pytest.importorskip("scrapy")
+
+from scrapy.http import HtmlResponse, Request, XmlResponse
+from soharvest.spiders.sitemap_spider import SOBaseSpider
+from soharvest.state import contentHash
+
+SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.org/ds/1</loc><lastmod>2020-01-01</lastmod></url>
+  <url><loc>https://example.org/ds/2</loc><lastmod>2020-02-01</lastmod></url>
+  <url><loc>https://example.org/ds/3</loc></url>
+</urlset>
+"""
+
+
+def sitemap():
+    return XmlResponse("https://example.org/sitemap.xml", body=SITEMAP)
+
+
+class TestSOBaseSpider:
+    def test_lastmod(self):
+        spider = SOBaseSpider()
+        requests = spider._parse_sitemap(sitemap())
+        assert [r.meta.get("lastmod") for r in requests] == [
+            "2020-01-01",
+            "2020-02-01",
+            None,
+        ]
+        assert spider._lastmod == {}
+
+    def test_state(self, tmp_path):
+        spider = SOBaseSpider(state=str(tmp_path / "state.sqlite"))
+        spider.state.update("https://example.org/ds/1", lastmod="2020-01-01")
+        spider.state.update("https://example.org/ds/2", lastmod="2019-01-01")
+        requests = spider._parse_sitemap(sitemap())
+        assert [r.url for r in requests] == [
+            "https://example.org/ds/2",
+            "https://example.org/ds/3",
+        ]
+        assert spider._lastmod == {}
+
+        body = b"<html></html>"
+        request = Request(requests[0].url, meta=requests[0].meta)
+        response = HtmlResponse(request.url, body=body, request=request)
+        item = next(iter(spider.parse(response)))
+        assert item["lastmod"] == "2020-02-01"
+        assert item["content_hash"] == contentHash(body)
+        # The same body again is not parsed
+        spider.state.update(request.url, content_hash=contentHash(body))
+        assert list(spider.parse(response)) == []
+        spider.closed("finished")
@@ -1,4 +1,14 @@
 """
 
 """
-from .common import *
\ No newline at end of file
+from . import common
+from .common import __all__
+
+
+def __getattr__(name):
+    # Names are imported from their submodule on first use, see sotools.common
+    return getattr(common, name)
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,383 @@
+"""
+Command line tools
+
+``sotools profile <file-or-url>`` runs the loading and extraction pipeline on
+a landing page or JSON-LD document under a profiler, to find out why a
+particular document is slow. Per stage timings are taken from
+:mod:`sotools.metrics`.
+
+Run with::
+
+  $ sotools profile https://example.org/dataset/1
+  $ sotools profile ds.json --profiler sample --output ds.folded
+  $ sotools profile page.html --shacl shapes.ttl --top 30
+
+"""
+import argparse
+import collections
+import cProfile
+import io
+import os
+import pstats
+import signal
+import sys
+import threading
+
+from . import metrics
+
+# Stage order of the report, other spans follow
+STAGES = [
+    "fetch",
+    "extract_jsonld",
+    "parse",
+    "identifiers",
+    "metadata",
+    "meta_validate",
+    "validate",
+]
+
+# Sort orders of the cProfile hotspots
+SORT_KEYS = [k.value for k in pstats.SortKey] + ["tottime"]
+
+
+def _frameLabel(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Sampling profiler recording the stacks of one thread
+
+    On POSIX systems, when created in the main thread, the stack is
+    recorded from a ``SIGPROF`` handler every interval seconds of CPU time.
+    Otherwise a background thread records the stack of the target thread
+    every interval seconds of wall time, which favours the points where the
+    target thread releases the GIL. The stacks are written in the collapsed
+    format read by ``flamegraph.pl``, speedscope and inferno, one
+    ``frame;frame;... count`` line per distinct stack, root first.
+
+    Args:
+        interval (float): Seconds between samples
+        thread_id (integer): Thread to sample, defaults to the calling thread
+
+    Example::
+
+        with StackSampler() as sampler:
+            work()
+        sampler.writeCollapsed(open("work.folded", "w"))
+    """
+
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.stacks = collections.Counter()
+        self.use_signal = (
+            hasattr(signal, "setitimer")
+            and self.thread_id == threading.main_thread().ident
+            and threading.get_ident() == self.thread_id
+        )
+        self._stop = threading.Event()
+        self._thread = None
+        self._handler = None
+
+    def _record(self, frame):
+        stack = []
+        while frame is not None:
+            stack.append(_frameLabel(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _onSignal(self, signum, frame):
+        self._record(frame)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._record(sys._current_frames().get(self.thread_id))
+
+    def __enter__(self):
+        if self.use_signal:
+            self._handler = signal.signal(signal.SIGPROF, self._onSignal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.use_signal:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._handler)
+        else:
+            self._stop.set()
+            self._thread.join()
+        return False
+
+    def hotspots(self, top=20):
+        """
+        Functions by number of samples in which they are running
+
+        Returns:
+            list: (own samples, total samples, function) tuples, most own samples first
+        """
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, n in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += n
+            for frame in set(frames):
+                total[frame] += n
+        return [(n, total[f], f) for f, n in own.most_common(top)]
+
+    def writeCollapsed(self, out):
+        for stack, n in sorted(self.stacks.items()):
+            out.write(f"{stack} {n}\n")
+
+
+def _isUrl(source):
+    return source.startswith("http://") or source.startswith("https://")
+
+
+def _load(source):
+    """
+    Graph of source, a landing page URL or a file of HTML or JSON-LD
+
+    Returns:
+        tuple: The graph, and True if source was HTML
+    """
+    import sotools.common
+
+    if _isUrl(source):
+        with metrics.span("fetch"):
+            response = sotools.common.fetchUrl(source)
+        return sotools.common.loadSOGraphFromHtml(response.content, response.url), True
+    with metrics.span("fetch"):
+        with open(source, "rb") as f:
+            content = f.read()
+    base = "file://" + os.path.abspath(source)
+    if content.lstrip()[:1] in (b"{", b"["):
+        g = sotools.common.loadSOGraph(data=content.decode("utf-8"), publicID=base)
+        return g, False
+    return sotools.common.loadSOGraphFromHtml(content, base), True
+
+
+def _warmUp():
+    # Import the modules used by the pipeline, and the JSON-LD parser plugin,
+    # so that one time import costs do not dominate the profile
+    import sotools.common
+
+    sotools.common.extractJsonLd("<html></html>")
+    sotools.common.loadSOGraph(data='{"@context": {"@vocab": "https://schema.org/"}}')
+    sotools.common.getDatasetIdentifiers(sotools.common.loadSOGraph(data="{}"))
+    sotools.common.getDatasetMetadataLinks(sotools.common.loadSOGraph(data="{}"))
+
+
+def runPipeline(source, validator=None):
+    """
+    Load source and run the extractions on the graph
+
+    Args:
+        source (string): Landing page URL, or file name of HTML or JSON-LD
+        validator (ShapeValidator): Also validate the graph, if given
+
+    Returns:
+        dict: graph, whether the source was HTML, Dataset nodes, identifiers,
+        metadata links and SHACL conformance
+    """
+    import sotools.common
+    from rdflib import RDF
+
+    g, html = _load(source)
+    result = {
+        "graph": g,
+        "html": html,
+        "datasets": set(g.subjects(RDF.type, sotools.common.SO.Dataset)),
+        "identifiers": sotools.common.getDatasetIdentifiers(g),
+        "metadata": sotools.common.getDatasetMetadataLinks(g),
+        "conforms": None,
+    }
+    if validator is not None:
+        result["conforms"] = validator.validate(g)[0]
+    return result
+
+
+def _printStages(m, out):
+    timers = m["timers"]
+    names = [s for s in STAGES if s in timers] + sorted(set(timers) - set(STAGES))
+    out.write(f"\n{'stage':<16} {'calls':>6} {'total ms':>10} {'max ms':>10}\n")
+    for name in names:
+        t = timers[name]
+        out.write(
+            f"{name:<16} {t['calls']:>6} {t['seconds'] * 1000:10.2f} {t['max_seconds'] * 1000:10.2f}\n"
+        )
+
+
+def profile(args, out=None):
+    """
+    Implementation of ``sotools profile``, see :func:`main`
+    """
+    if out is None:
+        out = sys.stdout
+    validator = None
+    was_enabled = metrics.metricsEnabled()
+    metrics.enableMetrics()
+    try:
+        if args.warmup:
+            _warmUp()
+        metrics.resetMetrics()
+        if args.shacl:
+            from .validation import ShapeValidator
+
+            # Loading the shapes is a fixed cost, timed but not profiled
+            validator = ShapeValidator(args.shacl, inference=args.inference)
+        output = args.output
+        if args.profiler == "sample":
+            output = output or "sotools-profile.folded"
+            profiler = StackSampler(interval=args.interval)
+            with profiler:
+                for _ in range(args.repeat):
+                    result = runPipeline(args.source, validator=validator)
+        else:
+            output = output or "sotools-profile.prof"
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                for _ in range(args.repeat):
+                    result = runPipeline(args.source, validator=validator)
+            finally:
+                profiler.disable()
+        m = metrics.getMetrics()
+    finally:
+        metrics.enableMetrics(was_enabled)
+
+    g = result["graph"]
+    out.write(f"source: {args.source}\n")
+    out.write(f"triples: {len(g)}\n")
+    if result["html"]:
+        blocks = m["counters"].get("jsonld_blocks", 0) // args.repeat
+    else:
+        blocks = "n/a"
+    out.write(f"JSON-LD blocks: {blocks}\n")
+    out.write(f"datasets: {len(result['datasets'])}\n")
+    out.write(f"identifiers: {len(result['identifiers'])}\n")
+    out.write(f"metadata links: {len(result['metadata'])}\n")
+    rewritten = m["counters"].get("terms_rewritten", 0) // args.repeat
+    out.write(f"rewritten terms: {rewritten}\n")
+    if result["conforms"] is not None:
+        out.write(f"SHACL conforms: {result['conforms']}\n")
+    _printStages(m, out)
+
+    out.write(f"\ntop {args.top} hotspots\n")
+    if args.profiler == "sample":
+        out.write(f"{'own':>8} {'total':>8}  function\n")
+        for own, total, frame in profiler.hotspots(args.top):
+            out.write(f"{own:>8} {total:>8}  {frame}\n")
+        with open(output, "w") as f:
+            profiler.writeCollapsed(f)
+        out.write(f"\ncollapsed stacks written to {output}\n")
+    else:
+        text = io.StringIO()
+        stats = pstats.Stats(profiler, stream=text)
+        stats.sort_stats(args.sort).print_stats(args.top)
+        # Skip the preamble down to the table
+        lines = text.getvalue().splitlines()
+        start = next((i for i, l in enumerate(lines) if "ncalls" in l), 0)
+        out.write("\n".join(lines[start:]).rstrip() + "\n")
+        stats.dump_stats(output)
+        out.write(f"\ncProfile stats written to {output}\n")
+    return 0
+
+
+def _positiveInt(text):
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {text}")
+    return value
+
+
+def _positiveFloat(text):
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {text!r}")
+    if not value > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {text}")
+    return value
+
+
+def main(argv=None):
+    """
+    Entry point of the ``sotools`` command
+
+    Args:
+        argv (list): Arguments, defaults to ``sys.argv[1:]``
+
+    Returns:
+        integer: Exit status
+    """
+    parser = argparse.ArgumentParser(prog="sotools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser(
+        "profile",
+        help="Profile loading and extracting a landing page or JSON-LD document",
+        description=(
+            "Run the sotools pipeline (fetch, extract JSON-LD, parse and normalize, "
+            "identifiers, metadata links and optionally SHACL validation) on a URL or "
+            "file under a profiler. Prints per stage timings, triple counts and the top "
+            "hotspots. The cProfile profiler writes pstats output (for snakeviz, "
+            "flameprof or gprof2dot), the sample profiler collapsed stacks (for "
+            "flamegraph.pl or speedscope)."
+        ),
+    )
+    p.add_argument("source", help="Landing page URL, or HTML or JSON-LD file")
+    p.add_argument("--profiler", choices=["cprofile", "sample"], default="cprofile")
+    p.add_argument(
+        "-o",
+        "--output",
+        help="Profile output file, default sotools-profile.prof or sotools-profile.folded",
+    )
+    p.add_argument(
+        "--top", type=_positiveInt, default=20, help="Number of hotspots shown"
+    )
+    p.add_argument(
+        "--sort",
+        default="tottime",
+        choices=SORT_KEYS,
+        help="cProfile sort order of the hotspots, tottime is an alias of time",
+    )
+    p.add_argument(
+        "--interval", type=_positiveFloat, default=0.001, help="Seconds between samples"
+    )
+    p.add_argument(
+        "--repeat",
+        type=_positiveInt,
+        default=1,
+        help="Run the pipeline several times, for more samples of small documents",
+    )
+    p.add_argument(
+        "--no-warmup",
+        dest="warmup",
+        action="store_false",
+        help="Include the import of the modules used by the pipeline in the profile",
+    )
+    p.add_argument("--shacl", help="SHACL shapes file to validate the graph with")
+    p.add_argument(
+        "--inference",
+        default="scoped",
+        choices=["scoped", "rdfs", "owlrl", "both", "none"],
+        help="Inference for SHACL validation, see ShapeValidator",
+    )
+    args = parser.parse_args(argv)
+    try:
+        return profile(args)
+    except (OSError, ValueError) as e:
+        print(f"sotools {args.command}: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
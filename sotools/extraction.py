@@ -0,0 +1,423 @@
+"""
+Extracting Dataset identifiers and metadata links from graphs
+"""
+
+import functools
+from rdflib import Literal, Namespace, RDF
+from .loading import SO, DATACITE
+from .metrics import countMetric, span
+
+
+SPARQL_PREFIXES = """
+    PREFIX rdf:      <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    PREFIX SO:   <https://schema.org/>
+    PREFIX xsd:  <http://www.w3.org/2001/XMLSchema#>
+    PREFIX datacite: <http://purl.org/spar/datacite/>
+"""
+
+# The namespaces of SPARQL_PREFIXES, for prepared queries
+SPARQL_NAMESPACES = {
+    "rdf": RDF,
+    "SO": SO,
+    "xsd": Namespace("http://www.w3.org/2001/XMLSchema#"),
+    "datacite": DATACITE,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _preparedQuery(q):
+    """
+    Parse and algebraize a SPARQL query once
+
+    Args:
+        q (string): SPARQL query using the prefixes of ``SPARQL_NAMESPACES``
+
+    Returns:
+        Query: The prepared query, reused for subsequent calls with q
+    """
+    # The SPARQL parser is slow to import and not needed by the graph walks
+    from rdflib.plugins.sparql import prepareQuery
+
+    return prepareQuery(q, initNs=SPARQL_NAMESPACES)
+
+
+def hasDataset(g):
+    """
+    Number of SO:Dataset graphs in g
+
+    Args:
+        g (Graph): The graph to evaluate
+
+    Returns:
+        integer: Number of SO:Dataset graphs in g
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_hasdataset_01.py
+
+    """
+    q = """
+    SELECT ?x 
+    { 
+        ?x rdf:type SO:Dataset .        
+    }
+    """
+    qres = g.query(_preparedQuery(q))
+    return len(qres)
+
+
+def getLiteralDatasetIdentifiers(g):
+    """
+    Retrieve literal SO:Dataset.identifier entries
+
+    Args:
+        g (Graph): Graph containing ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{value:, url:, propertyId:}`` with url=None and propertyId="Literal"
+    """
+    q = """
+    SELECT ?y
+    WHERE {
+        ?x rdf:type SO:Dataset .
+        ?x SO:identifier ?y .
+        FILTER (isLiteral(?y)) .
+    }
+    """
+    res = []
+    qres = g.query(_preparedQuery(q))
+    for v in qres:
+        res.append({"value": str(v[0]), "propertyId": "Literal", "url": None})
+    return res
+
+
+def getStructuredDatasetIdentifiers(g):
+    """
+    Extract structured SO:Dataset.identifier entries
+
+    Args:
+        g (Graph): Graph containing ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{value:, url:, propertyId:}``
+    """
+    q = """
+    SELECT DISTINCT ?value ?url ?propid
+    WHERE {
+        ?x rdf:type SO:Dataset .
+        ?x SO:identifier ?y .
+        ?y rdf:type ?tt .
+        ?y SO:value ?value .
+        ?y SO:propertyID ?propid .
+        OPTIONAL { ?y SO:url ?url } .
+        FILTER (?tt = SO:PropertyValue || ?tt = datacite:ResourceIdentifier)
+    }
+    """
+    res = []
+    qres = g.query(_preparedQuery(q))
+    for v in qres:
+        i = {"value": str(v[0]), "url": str(v[1]), "propertyId": str(v[2])}
+        res.append(i)
+    return res
+
+
+def getDatasetIdentifiers(g):
+    """
+    Return a list of ``SO:Dataset.identifier`` entries from the provided Graph
+
+    Args:
+        g (Graph): Graph containing ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{value:, url:, propertyId:}``
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_datasetidentifiers_01.py
+    """
+    # Walks the graph rather than evaluating the equivalent SPARQL of
+    # getLiteralDatasetIdentifiers and getStructuredDatasetIdentifiers
+    with span("identifiers"):
+        literal = []
+        structured = []
+        for x in _datasetNodes(g):
+            _datasetIdentifiers(g, x, literal, structured)
+        # Identifiers that are literals with no additional context come first
+        return literal + _distinct(structured)
+
+
+def getDatasetMetadataLinksFromEncoding(g):
+    """
+    Extract link to metadata from SO:Dataset.encoding
+
+    Args:
+        g: ConjunctiveGraph
+
+    Returns:
+        list: A list of ``{dateModified:, encodingFormat:, contentUrl:, description:, subjectOf:,}``
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_metadatalinks_encoding.py
+    """
+    q = """
+    SELECT ?dateModified ?encodingFormat ?contentUrl ?description ?x
+    WHERE {
+        ?x rdf:type SO:Dataset .
+        ?x SO:encoding ?y .
+        ?y SO:encodingFormat ?encodingFormat.
+        ?y SO:dateModified ?dateModified .
+        ?y SO:contentUrl ?contentUrl .
+        ?y SO:description ?description .
+    }
+    """
+    res = []
+    qres = g.query(_preparedQuery(q))
+    for item in qres:
+        entry = {
+            "dateModified": item[0],
+            "encodingFormat": str(item[1]),
+            "contentUrl": str(item[2]),
+            "description": str(item[3]),
+            "subjectOf": str(item[4]),
+        }
+        res.append(entry)
+    return res
+
+
+def getDatasetMetadataLinksFromSubjectOf(g):
+    """
+    Extract list of metadata links from SO.Dataset.subjectOf
+
+    Args:
+        g (Graph): Graph containing the ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{dateModified:, encodingFormat:, contentUrl:, description:, subjectOf:,}``
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_metadatalinks_subjectof.py
+    """
+    q = """
+    SELECT ?dateModified ?encodingFormat ?url ?description ?about
+    WHERE {
+        ?about rdf:type SO:Dataset .
+        ?about SO:subjectOf ?y .
+        ?y SO:url ?url .
+        ?y SO:encodingFormat ?encodingFormat .
+        OPTIONAL {
+          ?y SO:dateModified ?dateModified .
+          ?y SO:description ?description .
+        }    
+    }
+    """
+    res = []
+    qres = g.query(_preparedQuery(q))
+    for item in qres:
+        entry = {
+            "dateModified": item[0],
+            "encodingFormat": str(item[1]),
+            "contentUrl": str(item[2]),
+            "description": str(item[3]),
+            "subjectOf": str(item[4]),
+        }
+        res.append(entry)
+    return res
+
+
+def getDatasetMetadataLinksFromAbout(g):
+    """
+    Extract a list of metadata links SO:about(SO:Dataset)
+
+    Args:
+        g(Graph): Graph containing an ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{dateModified:, encodingFormat:, contentUrl:, description:, subjectOf:,}``
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_metadatalinks_about.py
+    """
+    q = """
+    SELECT ?dateModified ?encodingFormat ?contentUrl ?description ?about
+    WHERE {
+        ?about rdf:type SO:Dataset .
+        ?y SO:about ?about .
+        ?y SO:contentUrl ?contentUrl .
+        ?y SO:encodingFormat ?encodingFormat .
+        OPTIONAL {
+          ?y SO:dateModified ?dateModified .
+          ?y SO:description ?description .
+        }
+    }
+    """
+    res = []
+    qres = g.query(_preparedQuery(q))
+    for item in qres:
+        entry = {
+            "dateModified": item[0],
+            "encodingFormat": str(item[1]),
+            "contentUrl": str(item[2]),
+            "description": str(item[3]),
+            "subjectOf": str(item[4]),
+        }
+        res.append(entry)
+    return res
+
+
+def getDatasetMetadataLinks(g):
+    """
+    Extract links to metadata documents describing SO:Dataset
+
+    Metadata docs can be referenced different ways
+
+    * as SO:Dataset.subjectOf
+    * the inverse of 1, SO:CreativeWork.about(SO:Dataset)
+    * SO:Dataset.encoding
+
+    Args:
+        g (Graph): Graph containing ``SO:Dataset``
+
+    Returns:
+        list: A list of ``{dateModified:, encodingFormat:, contentUrl:, description:, subjectOf:,}``
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_metadatalinks_01.py
+    """
+    # Walks the graph rather than evaluating the three SPARQL based
+    # getDatasetMetadataLinksFrom* helpers, keeping their order: links
+    # through encoding of all Datasets, then subjectOf, then about
+    with span("metadata"):
+        res = ([], [], [])
+        for x in _datasetNodes(g):
+            _datasetMetadataLinks(g, x, *res)
+        return res[0] + res[1] + res[2]
+
+
+def extractDatasetSummary(g):
+    """
+    Identifiers and metadata links of all ``SO:Dataset`` in g
+
+    Equivalent to calling :func:`getDatasetIdentifiers` and
+    :func:`getDatasetMetadataLinks`, in a single walk over the Dataset nodes.
+
+    Args:
+        g (Graph): Graph containing ``SO:Dataset``
+
+    Returns:
+        dict: ``{identifiers:, metadata:}`` with lists as returned by
+        :func:`getDatasetIdentifiers` and :func:`getDatasetMetadataLinks`
+    """
+    with span("summary"):
+        literal = []
+        structured = []
+        metadata = ([], [], [])
+        n = 0
+        for x in _datasetNodes(g):
+            n += 1
+            _datasetIdentifiers(g, x, literal, structured)
+            _datasetMetadataLinks(g, x, *metadata)
+        countMetric("datasets", n)
+        return {
+            "identifiers": literal + _distinct(structured),
+            "metadata": metadata[0] + metadata[1] + metadata[2],
+        }
+
+
+# The functions below extract the same results as the SPARQL based helpers
+# by walking the graph with indexed triple pattern lookups. All the
+# patterns hang off the SO:Dataset nodes, so those are found once and each
+# is visited a single time.
+
+
+def _datasetNodes(g):
+    # Unique, in graph order
+    return list(dict.fromkeys(g.subjects(RDF.type, SO.Dataset)))
+
+
+def _distinct(entries):
+    # SELECT DISTINCT over dict entries
+    return list({tuple(e.items()): e for e in entries}.values())
+
+
+def _datasetIdentifiers(g, x, literal, structured):
+    """
+    Append identifiers of the Dataset x to the literal and structured lists
+
+    Same results as :func:`getLiteralDatasetIdentifiers` and
+    :func:`getStructuredDatasetIdentifiers`, without DISTINCT applied.
+    """
+    id_types = (SO.PropertyValue, DATACITE.ResourceIdentifier)
+    for y in g.objects(x, SO.identifier):
+        if isinstance(y, Literal):
+            literal.append({"value": str(y), "propertyId": "Literal", "url": None})
+            continue
+        if not any((y, RDF.type, tt) in g for tt in id_types):
+            continue
+        urls = list(g.objects(y, SO.url)) or [None]
+        for value in g.objects(y, SO.value):
+            for propid in g.objects(y, SO.propertyID):
+                for url in urls:
+                    structured.append(
+                        {"value": str(value), "url": str(url), "propertyId": str(propid)}
+                    )
+
+
+def _optionalDateDescription(g, y):
+    # OPTIONAL { ?y SO:dateModified ?dateModified . ?y SO:description ?description . }
+    res = [
+        (date_modified, description)
+        for date_modified in g.objects(y, SO.dateModified)
+        for description in g.objects(y, SO.description)
+    ]
+    return res or [(None, None)]
+
+
+def _metadataLink(date_modified, encoding_format, content_url, description, x):
+    return {
+        "dateModified": date_modified,
+        "encodingFormat": str(encoding_format),
+        "contentUrl": str(content_url),
+        "description": str(description),
+        "subjectOf": str(x),
+    }
+
+
+def _datasetMetadataLinks(g, x, encoding, subject_of, about):
+    """
+    Append metadata links of the Dataset x to the encoding, subject_of and
+    about lists
+
+    Same results as :func:`getDatasetMetadataLinksFromEncoding`,
+    :func:`getDatasetMetadataLinksFromSubjectOf` and
+    :func:`getDatasetMetadataLinksFromAbout` respectively.
+    """
+    for y in g.objects(x, SO.encoding):
+        for encoding_format in g.objects(y, SO.encodingFormat):
+            for date_modified in g.objects(y, SO.dateModified):
+                for content_url in g.objects(y, SO.contentUrl):
+                    for description in g.objects(y, SO.description):
+                        encoding.append(
+                            _metadataLink(
+                                date_modified, encoding_format, content_url, description, x
+                            )
+                        )
+    for y in g.objects(x, SO.subjectOf):
+        for url in g.objects(y, SO.url):
+            for encoding_format in g.objects(y, SO.encodingFormat):
+                for date_modified, description in _optionalDateDescription(g, y):
+                    subject_of.append(
+                        _metadataLink(date_modified, encoding_format, url, description, x)
+                    )
+    for y in g.subjects(SO.about, x):
+        for content_url in g.objects(y, SO.contentUrl):
+            for encoding_format in g.objects(y, SO.encodingFormat):
+                for date_modified, description in _optionalDateDescription(g, y):
+                    about.append(
+                        _metadataLink(
+                            date_modified, encoding_format, content_url, description, x
+                        )
+                    )
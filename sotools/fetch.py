@@ -0,0 +1,403 @@
+"""
+Loading graphs from landing pages over HTTP
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+import urllib.parse
+import requests
+import requests.adapters
+import urllib3.util
+from .loading import SOGraphResult
+from .jsonld import loadSOGraphFromHtml
+
+
+# Defaults for HTTP requests, timeout is (connect, read) seconds
+HTTP_TIMEOUT = (10, 30)
+HTTP_RETRIES = 3
+HTTP_BACKOFF = 0.5
+HTTP_POOL_SIZE = 10
+
+logger = logging.getLogger(__name__)
+
+
+def createSession(retries=HTTP_RETRIES, backoff=HTTP_BACKOFF, pool_size=HTTP_POOL_SIZE):
+    """
+    Create a requests Session with connection pooling and retries
+
+    Connections are kept alive and reused per host. Connection errors and
+    responses with status 429, 500, 502, 503 or 504 are retried with
+    exponential backoff.
+
+    Args:
+        retries (integer): Maximum number of retries for a request
+        backoff (float): Backoff factor in seconds between retries
+        pool_size (integer): Number of hosts with pooled connections, and
+            maximum number of connections kept per host
+
+    Returns:
+        requests.Session: Session for use with :func:`loadSOGraphFromUrl`
+    """
+    retry = urllib3.util.Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        raise_on_status=False,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+_session = None
+
+
+def getSession():
+    """
+    The shared session used when none is provided to a fetch
+
+    Returns:
+        requests.Session: Session created with :func:`createSession` on first use
+    """
+    global _session
+    if _session is None:
+        _session = createSession()
+    return _session
+
+
+def fetchUrl(url, session=None, timeout=HTTP_TIMEOUT, headers=None):
+    """
+    GET url, raising ValueError unless the response status is OK
+
+    A 304 Not Modified response is also accepted when the request is
+    conditional, i.e. headers include ``If-None-Match`` or ``If-Modified-Since``.
+
+    Args:
+        url (string): Url to retrieve
+        session (requests.Session): Session to use, defaults to :func:`getSession`
+        timeout (float or tuple): Seconds to wait, or (connect, read) seconds
+        headers (dict): Additional request headers
+
+    Returns:
+        requests.Response: The response
+    """
+    if session is None:
+        session = getSession()
+    response = session.get(url, timeout=timeout, headers=headers)
+    if response.status_code == requests.codes.not_modified and headers:
+        if "If-None-Match" in headers or "If-Modified-Since" in headers:
+            return response
+    if response.status_code != requests.codes.ok:
+        raise ValueError(
+            f"GET request to {url} returned a status of {response.status_code}"
+        )
+    return response
+
+
+class HttpCache:
+    """
+    On-disk cache of graphs loaded from landing pages, for conditional GET
+
+    The graph loaded from a page is stored with the ``ETag`` and
+    ``Last-Modified`` validators of the response. The next fetch of the url
+    sends ``If-None-Match`` and ``If-Modified-Since``, and on a 304 Not
+    Modified response the cached graph is returned without parsing the page.
+    Responses without validators are not cached.
+
+    Entries are held in a SQLite database. Entries older than ``max_age``
+    are evicted, as are the least recently used entries once the stored
+    graphs exceed ``max_bytes``.
+
+    Args:
+        path (string): SQLite database file, created if necessary
+        max_bytes (integer): Maximum total size of the cached graphs, None for no limit
+        max_age (float): Maximum age of an entry in seconds, None for no limit
+
+    Example::
+
+        cache = HttpCache("landing_pages.sqlite")
+        g = loadSOGraphFromUrl(url, cache=cache)
+
+    """
+
+    def __init__(self, path, max_bytes=1024 ** 3, max_age=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS page (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                graph BLOB,
+                size INTEGER,
+                stored REAL,
+                accessed REAL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS page_accessed ON page(accessed)")
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM page").fetchone()[0]
+
+    def validators(self, url):
+        """
+        Conditional request headers for url
+
+        Returns:
+            dict: ``If-None-Match`` and / or ``If-Modified-Since`` headers, empty
+            if url is not cached
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, stored FROM page WHERE url=?", (url,)
+            ).fetchone()
+        headers = {}
+        if row is None:
+            return headers
+        if self.max_age is not None and row[2] < time.time() - self.max_age:
+            return headers
+        if row[0] is not None:
+            headers["If-None-Match"] = row[0]
+        if row[1] is not None:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def get(self, url):
+        """
+        The cached graph for url
+
+        Returns:
+            ConjunctiveGraph: The graph, or None if url is not cached
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT graph FROM page WHERE url=?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE page SET accessed=? WHERE url=?", (time.time(), url)
+            )
+            self._db.commit()
+        return pickle.loads(row[0])
+
+    def put(self, url, response, g):
+        """
+        Cache the graph g loaded from response to a request for url
+
+        Args:
+            url (string): The requested url
+            response (requests.Response): The response the graph was loaded from
+            g (ConjunctiveGraph): The graph
+
+        Returns:
+            boolean: True if the graph was cached
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag is None and last_modified is None:
+            return False
+        data = pickle.dumps(g, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO page VALUES (?,?,?,?,?,?,?,?)",
+                (url, response.url, etag, last_modified, data, len(data), now, now),
+            )
+            self._evict(now)
+            self._db.commit()
+        return True
+
+    def _evict(self, now):
+        if self.max_age is not None:
+            self._db.execute("DELETE FROM page WHERE stored < ?", (now - self.max_age,))
+        if self.max_bytes is None:
+            return
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM page").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._db.execute(
+            "SELECT url, size FROM page ORDER BY accessed"
+        ).fetchall():
+            self._db.execute("DELETE FROM page WHERE url=?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+
+def _fetchCached(url, session=None, timeout=HTTP_TIMEOUT, cache=None):
+    """
+    Fetch url, using cache for a conditional request if provided
+
+    Returns:
+        tuple: (response, cached graph or None)
+    """
+    headers = None
+    if cache is not None:
+        headers = cache.validators(url)
+    response = fetchUrl(url, session=session, timeout=timeout, headers=headers)
+    if response.status_code == requests.codes.not_modified:
+        g = cache.get(url)
+        if g is not None:
+            return response, g
+        # Evicted since the validators were read, fetch unconditionally
+        response = fetchUrl(url, session=session, timeout=timeout)
+    return response, None
+
+
+def loadSOGraphFromUrl(url, session=None, timeout=HTTP_TIMEOUT, cache=None):
+    """
+    Loads graph from json-ld contained in a landing page.
+
+    Args:
+        url (string): Url to process
+        session (requests.Session): Session to use, defaults to :func:`getSession`
+        timeout (float or tuple): Seconds to wait, or (connect, read) seconds
+        cache (HttpCache): Cache for conditional requests, None to always fetch
+
+    Returns:
+        ConjunctiveGraph: Graph of instance
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_loadfromurl_01.py
+    """
+    response, g = _fetchCached(url, session=session, timeout=timeout, cache=cache)
+    if g is not None:
+        return g
+    g = loadSOGraphFromHtml(response.text, response.url)
+    if cache is not None:
+        cache.put(url, response, g)
+    return g
+
+
+async def aloadSOGraphFromUrl(
+    url,
+    session=None,
+    timeout=HTTP_TIMEOUT,
+    cache=None,
+    fetch_executor=None,
+    parse_executor=None,
+):
+    """
+    Coroutine version of :func:`loadSOGraphFromUrl`
+
+    The blocking fetch and the CPU bound parse both run in executors so the
+    event loop stays responsive.
+
+    Args:
+        url (string): Url to process
+        session (requests.Session): Session to use, defaults to :func:`getSession`
+        timeout (float or tuple): Seconds to wait, or (connect, read) seconds
+        cache (HttpCache): Cache for conditional requests, None to always fetch
+        fetch_executor (Executor): Executor for the request, default executor if None
+        parse_executor (Executor): Executor for parsing, e.g. a ProcessPoolExecutor.
+            Default executor if None.
+
+    Returns:
+        ConjunctiveGraph: Graph of instance
+    """
+    loop = asyncio.get_running_loop()
+    response, g = await loop.run_in_executor(
+        fetch_executor,
+        functools.partial(_fetchCached, url, session=session, timeout=timeout, cache=cache),
+    )
+    if g is not None:
+        return g
+    g = await loop.run_in_executor(
+        parse_executor, loadSOGraphFromHtml, response.text, response.url
+    )
+    if cache is not None:
+        await loop.run_in_executor(fetch_executor, cache.put, url, response, g)
+    return g
+
+
+async def aloadSOGraphsFromUrls(
+    urls,
+    concurrency=32,
+    per_host=4,
+    session=None,
+    timeout=HTTP_TIMEOUT,
+    cache=None,
+    parse_executor=None,
+):
+    """
+    Load graphs from many landing pages concurrently
+
+    Args:
+        urls (iterable): Urls to process
+        concurrency (integer): Maximum number of requests in flight
+        per_host (integer): Maximum number of requests in flight to any one host
+        session (requests.Session): Session to use, defaults to :func:`getSession`
+        timeout (float or tuple): Seconds to wait, or (connect, read) seconds
+        cache (HttpCache): Cache for conditional requests, None to always fetch
+        parse_executor (Executor): Executor for parsing, e.g. a ProcessPoolExecutor.
+            Default executor if None.
+
+    Returns:
+        list of SOGraphResult: ``(url, graph, error)`` in the order of urls
+    """
+    urls = list(urls)
+    limit = asyncio.Semaphore(concurrency)
+    host_limits = {}
+    for url in urls:
+        host = urllib.parse.urlsplit(url).netloc
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(per_host)
+
+    async def _load(url, fetch_executor):
+        async with host_limits[urllib.parse.urlsplit(url).netloc], limit:
+            try:
+                g = await aloadSOGraphFromUrl(
+                    url,
+                    session=session,
+                    timeout=timeout,
+                    cache=cache,
+                    fetch_executor=fetch_executor,
+                    parse_executor=parse_executor,
+                )
+                return SOGraphResult(url, g, None)
+            except Exception as e:
+                logger.warning(f"Failed to load {url}: {e}")
+                return SOGraphResult(url, None, e)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as fetch_executor:
+        return await asyncio.gather(*[_load(url, fetch_executor) for url in urls])
+
+
+def loadSOGraphsFromUrls(urls, **kwargs):
+    """
+    Load graphs from many landing pages concurrently
+
+    Runs :func:`aloadSOGraphsFromUrls` in a new event loop. Use the coroutine
+    directly when an event loop is already running.
+
+    Args:
+        urls (iterable): Urls to process
+        **kwargs: Passed to :func:`aloadSOGraphsFromUrls`
+
+    Returns:
+        list of SOGraphResult: ``(url, graph, error)`` in the order of urls
+    """
+    return asyncio.run(aloadSOGraphsFromUrls(urls, **kwargs))
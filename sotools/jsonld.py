@@ -0,0 +1,216 @@
+"""
+Extracting JSON-LD embedded in HTML
+"""
+
+import hashlib
+import json
+import logging
+import re
+import urllib.parse
+from .loading import _newSOGraph, _parseSOGraph
+from .metrics import countMetric, metricsEnabled, span
+
+
+# Media type of script elements holding JSON-LD
+JSONLD_MEDIA_TYPE = "application/ld+json"
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLdScanner:
+    """
+    Find ``application/ld+json`` script blocks in HTML without building a DOM
+
+    The document is scanned with regular expressions for comments and
+    ``<script>`` start tags, and the text of matching script elements is
+    decoded as JSON. This is much cheaper than parsing a large page into a
+    tree, but only handles well formed markup. :meth:`extract` raises
+    ``ValueError`` when a block can not be found or decoded, so callers can
+    fall back to a full HTML parser.
+    """
+
+    _re_tag = re.compile(r"<!--.*?-->|<script\b([^>]*)>", re.IGNORECASE | re.DOTALL)
+    _re_end = re.compile(r"</script\s*>", re.IGNORECASE)
+    _re_type = re.compile(
+        r"""\btype\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""", re.IGNORECASE
+    )
+
+    def blocks(self, html):
+        """
+        Text of each JSON-LD script element in html
+
+        Args:
+            html (string): HTML text to scan
+
+        Returns:
+            iterator of string: script element content
+        """
+        pos = 0
+        while True:
+            m = self._re_tag.search(html, pos)
+            if m is None:
+                return
+            pos = m.end()
+            attrs = m.group(1)
+            if attrs is None:
+                # comment
+                continue
+            end = self._re_end.search(html, pos)
+            if end is None:
+                raise ValueError(f"Unterminated script element at {m.start()}")
+            t = self._re_type.search(attrs)
+            if t is not None:
+                media_type = next(v for v in t.groups() if v is not None)
+                if media_type.strip().lower() == JSONLD_MEDIA_TYPE:
+                    yield html[pos : end.start()]
+            pos = end.end()
+
+    def extract(self, html):
+        """
+        Decoded JSON-LD items from the script blocks of html
+
+        Mirrors ``extruct.jsonld.JsonLdExtractor.extract``: top level arrays
+        are flattened and empty items are dropped.
+
+        Args:
+            html (string or bytes): HTML text to scan, bytes are decoded as UTF-8
+
+        Returns:
+            list: JSON-LD items as Python objects
+        """
+        if isinstance(html, (bytes, bytearray)):
+            html = html.decode("utf-8")
+        res = []
+        for block in self.blocks(html):
+            data = json.loads(block, strict=False)
+            if isinstance(data, list):
+                res += [item for item in data if item]
+            elif isinstance(data, dict) and data:
+                res.append(data)
+        return res
+
+
+# Extractors are reused across calls
+_jsonld_scanner = JsonLdScanner()
+_jsonld_extractor = None
+
+
+def _getJsonLdExtractor():
+    global _jsonld_extractor
+    if _jsonld_extractor is None:
+        # extruct pulls in lxml and several parsers, import on first use
+        from extruct.jsonld import JsonLdExtractor
+
+        _jsonld_extractor = JsonLdExtractor()
+    return _jsonld_extractor
+
+
+def extractJsonLd(html, fast=True):
+    """
+    Extract JSON-LD items embedded in HTML
+
+    Args:
+        html (string or bytes): HTML text to be parsed
+        fast (boolean): Try :class:`JsonLdScanner` first, using extruct only if
+            the scanner can not handle the page. If False, always use extruct.
+
+    Returns:
+        list: JSON-LD items as Python objects
+    """
+    if fast:
+        try:
+            return _jsonld_scanner.extract(html)
+        except ValueError as e:
+            # includes JSON and unicode decoding errors
+            logger.debug(f"Falling back to extruct: {e}")
+    return _getJsonLdExtractor().extract(html)
+
+
+def _isRelative(ref):
+    return isinstance(ref, str) and not ref.startswith("_:") and (
+        urllib.parse.urlsplit(ref).scheme == ""
+    )
+
+
+def _hasRelativeReference(value, id_terms=frozenset()):
+    """
+    True if value has an ``@id``, or a term typed ``@id`` in an inline
+    context, that is a relative reference resolved against the page URL
+    """
+    if isinstance(value, list):
+        return any(_hasRelativeReference(v, id_terms) for v in value)
+    if not isinstance(value, dict):
+        return False
+    context = value.get("@context")
+    if isinstance(context, dict):
+        id_terms = id_terms | {
+            k
+            for k, v in context.items()
+            if isinstance(v, dict) and v.get("@type") == "@id"
+        }
+    for k, v in value.items():
+        if k == "@context":
+            continue
+        if k == "@id" or k in id_terms:
+            refs = v if isinstance(v, list) else [v]
+            if any(_isRelative(r) for r in refs):
+                return True
+        if _hasRelativeReference(v, id_terms):
+            return True
+    return False
+
+
+def jsonLdDigest(items, base=None):
+    """
+    SHA-256 hex digest of canonicalized JSON-LD items
+
+    Items are serialized with sorted keys and without insignificant
+    whitespace, so the same JSON-LD embedded in different pages has the same
+    digest regardless of formatting and key order. When the items contain
+    relative references, which resolve differently on each page, the base
+    URL is included in the digest.
+
+    Args:
+        items (list): JSON-LD items as returned by :func:`extractJsonLd`
+        base (string): URL of the page the items are from
+
+    Returns:
+        string: Hex digest
+    """
+    canonical = json.dumps(
+        items, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    h = hashlib.sha256(canonical.encode("utf-8"))
+    if base is not None and _hasRelativeReference(items):
+        h.update(b"\n")
+        h.update(base.encode("utf-8"))
+    return h.hexdigest()
+
+
+def loadSOGraphFromHtml(html, url, fast=True):
+    """
+    Extract jsonld entries from provided HTML text
+
+    Each JSON-LD block is parsed directly from the objects decoded by the
+    extractor into a single graph for the page.
+
+    Args:
+        html(string): HTML text to be parsed
+        url(string): URL of the page, used as the document base
+        fast(boolean): Use the lightweight script scanner, see :func:`extractJsonLd`
+
+    Returns:
+        ConjunctiveGraph: Graph loaded from html
+
+    """
+    with span("extract_jsonld"):
+        json_content = extractJsonLd(html, fast=fast)
+    g = _newSOGraph()
+    with span("parse"):
+        for json_data in json_content:
+            _parseSOGraph(g, data=json_data, publicID=url)
+    if metricsEnabled():
+        countMetric("documents")
+        countMetric("jsonld_blocks", len(json_content))
+        countMetric("triples", len(g))
+    return g
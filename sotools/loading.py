@@ -0,0 +1,388 @@
+"""
+Loading schema.org JSON-LD into graphs with normalized schema.org terms
+"""
+
+import collections
+import concurrent.futures
+import functools
+import logging
+import os
+import re
+from rdflib import ConjunctiveGraph, Namespace, URIRef
+from rdflib.parser import PythonInputSource
+from rdflib.plugins.stores.memory import Memory
+from .metrics import countMetric, metricsEnabled, span
+
+
+SCHEMA_ORG = "https://schema.org/"
+SO_PREFIX = "SO"
+
+SO = Namespace(SCHEMA_ORG)
+DATACITE = Namespace("http://purl.org/spar/datacite/")
+
+# Mapping to undo case confusion
+# For example, "propertyId" should be "propertyID"
+# The LHS is the lowercase match to the correct RHS value
+SO_TERMS = {"propertyid": "propertyID", "dataset": "Dataset"}
+
+# Match variants of "https://schema.org/"
+RE_SO = re.compile(r"^http.{0,1}://schema\.org/{0,1}")
+
+# Maximum number of distinct URIRefs held by the term rewrite cache
+TERM_CACHE_SIZE = 8192
+
+logger = logging.getLogger(__name__)
+
+
+def _desloppifyTerm(t):
+    """
+    Deal with sloppy case consistency in SO term use
+
+    for example:
+      SO:propertyId should be SO:propertyID
+
+    Only terms in the ``<https://schema.org/>`` namespace are examined, so
+    this should be applied after :func:`_normalizeTerm`.
+
+    Args:
+        t: term to de-slop
+
+    Returns:
+        term, de-slopped
+    """
+    if isinstance(t, URIRef) and t.startswith(SCHEMA_ORG):
+        term = t[len(SCHEMA_ORG) :]
+        # Check the term value for case errors
+        t_val = SO_TERMS.get(term.lower(), term)
+        if t_val != term:
+            logger.debug(f"replacing SO:{term} with {t_val}")
+            return URIRef(t_val, SCHEMA_ORG)
+    return t
+
+
+def _normalizeTerm(t):
+    """
+    Hack the URIRefs to normalize schema.org to use "https://schema.org/"
+
+    This is an ugly solution to the problem of variable representations of
+    the schema.org namespace in the wild.
+
+    Args:
+        t: Graph term to process
+
+    Returns:
+        Graph term normalized to namespace <https://schema.org/>
+    """
+    if isinstance(t, URIRef):
+        v = str(t)
+        so_match = RE_SO.match(v)
+        if so_match is not None:
+            v = v[so_match.end() :]
+            if v[-1] == "/":
+                v = v[:-1]
+            return URIRef(v, SCHEMA_ORG)
+    return t
+
+
+def _rewriteTerm(t, normalize=True, deslop=True):
+    """
+    Apply :func:`_normalizeTerm` and / or :func:`_desloppifyTerm` to t
+
+    Args:
+        t: Graph term to process
+        normalize (boolean): Normalize the use of schema.org namespace
+        deslop (boolean): Adjust schema.org terms for case consistency
+
+    Returns:
+        Graph term, rewritten
+    """
+    if normalize:
+        t = _normalizeTerm(t)
+    if deslop:
+        t = _desloppifyTerm(t)
+    return t
+
+
+_cachedRewriteTerm = functools.lru_cache(maxsize=TERM_CACHE_SIZE)(_rewriteTerm)
+
+
+def setTermCacheSize(maxsize=TERM_CACHE_SIZE):
+    """
+    Replace the shared term rewrite cache with one holding up to maxsize terms
+
+    The cache maps each URIRef seen while loading to its normalized and
+    de-slopped form. It is shared by all loads in the process and evicts
+    least recently used entries once full.
+
+    Args:
+        maxsize (integer): Maximum number of cached terms, None for unbounded
+
+    Returns:
+        None
+    """
+    global _cachedRewriteTerm
+    _cachedRewriteTerm = functools.lru_cache(maxsize=maxsize)(_rewriteTerm)
+
+
+def termCacheInfo():
+    """
+    Statistics of the shared term rewrite cache
+
+    Returns:
+        namedtuple: ``(hits, misses, maxsize, currsize)``
+    """
+    return _cachedRewriteTerm.cache_info()
+
+
+def clearTermCache():
+    """
+    Empty the shared term rewrite cache and reset its statistics
+
+    Returns:
+        None
+    """
+    _cachedRewriteTerm.cache_clear()
+
+
+class SONormalizingStore(Memory):
+    """
+    In-memory store that normalizes schema.org terms as triples are added.
+
+    Terms are rewritten with :func:`_normalizeTerm` and
+    :func:`_desloppifyTerm` before being indexed, so a parser writing to a
+    graph backed by this store produces the normalized graph in a single
+    pass. Triples added to the graph after loading are normalized the
+    same way. Rewritten URIRefs are memoized in a bounded cache shared by
+    all stores, see :func:`termCacheInfo`.
+
+    Args:
+        normalize (boolean): Normalize the use of schema.org namespace
+        deslop (boolean): Adjust schema.org terms for case consistency
+    """
+
+    def __init__(self, configuration=None, identifier=None, normalize=True, deslop=True):
+        super(SONormalizingStore, self).__init__(
+            configuration=configuration, identifier=identifier
+        )
+        self.normalize = normalize
+        self.deslop = deslop
+
+    def _rewrite(self, t):
+        # Only URIRefs are rewritten. They repeat heavily across documents
+        # so go through the shared cache.
+        if isinstance(t, URIRef):
+            return _cachedRewriteTerm(t, self.normalize, self.deslop)
+        return t
+
+    def add(self, triple, context, quoted=False):
+        s, p, o = triple
+        rs, rp, ro = self._rewrite(s), self._rewrite(p), self._rewrite(o)
+        if metricsEnabled():
+            # Counted here rather than in the cached rewrite, so every
+            # occurrence counts regardless of what is already cached
+            n = (rs != s) + (rp != p) + (ro != o)
+            if n > 0:
+                countMetric("terms_rewritten", n)
+        super(SONormalizingStore, self).add((rs, rp, ro), context, quoted=quoted)
+
+
+def _newSOGraph(normalize=True, deslop=True):
+    """
+    Create an empty ConjunctiveGraph for loading schema.org content.
+
+    Args:
+        normalize (boolean): Normalize the use of schema.org namespace
+        deslop (boolean): Adjust schema.org terms for case consistency
+
+    Returns:
+        ConjunctiveGraph: Graph that normalizes terms as they are added
+    """
+    if not (normalize or deslop):
+        return ConjunctiveGraph()
+    g = ConjunctiveGraph(store=SONormalizingStore(normalize=normalize, deslop=deslop))
+    g.namespace_manager.bind(SO_PREFIX, SCHEMA_ORG, override=True, replace=True)
+    return g
+
+
+def loadSOGraph(
+    filename=None,
+    data=None,
+    publicID=None,
+    normalize=True,
+    deslop=True,
+    format="json-ld",
+):
+    """
+    Load RDF string or file to an RDFLib ConjunctiveGraph
+
+    Creates a ConjunctiveGraph from  the provided file or text. If both are
+    provided then text is used.
+
+    NOTE: Namespace use of ``<http://schema.org>``, ``<https://schema.org>``, or
+    ``<http://schema.org/>`` is normalized to ``<https://schema.org/>`` if
+    ``normalize`` is True.
+
+    NOTE: Case of ``SO:`` properties in `SO_TERMS` is adjusted consistency if
+    ``deslop`` is True
+
+    Normalization is applied by :class:`SONormalizingStore` while the
+    document is parsed, so the graph is built and indexed only once.
+
+    Args:
+        filename (string):  path to RDF file on disk
+        data (string, dict or list): RDF text, or JSON-LD already decoded to Python objects
+        publicID (string): (from rdflib) The logical URI to use as the document base. If None specified the document location is used.
+        normalize (boolean): Normalize the use of schema.org namespace
+        deslop (boolean): Adjust schema.org terms for case consistency
+        format (string): The serialization format of the RDF to load
+
+    Returns:
+        ConjunctiveGraph: The loaded graph
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_loadsograph_01.py
+
+    """
+    # Terms are normalized by the store as the parser emits triples
+    g = _newSOGraph(normalize=normalize, deslop=deslop)
+    with span("parse"):
+        _parseSOGraph(g, filename=filename, data=data, publicID=publicID, format=format)
+    if metricsEnabled():
+        countMetric("documents")
+        countMetric("triples", len(g))
+    return g
+
+
+def _parseSOGraph(g, filename=None, data=None, publicID=None, format="json-ld"):
+    """
+    Parse RDF from file, text or decoded JSON-LD into an existing graph
+
+    Args:
+        g (Graph): Graph receiving the parsed triples
+        filename (string):  path to RDF file on disk
+        data (string, dict or list): RDF text, or JSON-LD already decoded to Python objects
+        publicID (string): The logical URI to use as the document base
+        format (string): The serialization format of the RDF to load
+
+    Returns:
+        Graph: g
+    """
+    if isinstance(data, (dict, list)):
+        # Already decoded JSON-LD, skip the text round trip
+        g.parse(source=PythonInputSource(data), format=format, publicID=publicID)
+    elif data is not None:
+        g.parse(data=data, format=format, publicID=publicID)
+    elif filename is not None:
+        g.parse(filename, format=format, publicID=publicID)
+    return g
+
+
+SOGraphResult = collections.namedtuple("SOGraphResult", ["source", "graph", "error"])
+SOGraphResult.__doc__ = """
+Result of loading one document with :func:`loadSOGraphs`
+
+``graph`` is a ConjunctiveGraph, or N-Triples bytes if requested, and is
+None when loading failed, in which case ``error`` holds the exception.
+"""
+
+
+def _loadSOGraphChunk(sources, ntriples, kwargs):
+    """
+    Load a list of sources in a worker process
+
+    Returns:
+        list: ``(graph, error)`` for each source
+    """
+    res = []
+    for source in sources:
+        try:
+            g = loadSOGraph(filename=source, **kwargs)
+            if ntriples:
+                g = g.serialize(format="nt", encoding="utf-8")
+            res.append((g, None))
+        except Exception as e:
+            res.append((None, e))
+    return res
+
+
+def _chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if len(chunk) > 0:
+        yield chunk
+
+
+def loadSOGraphs(
+    sources, workers=None, ntriples=False, chunksize=16, prefetch=4, **kwargs
+):
+    """
+    Load many RDF documents in parallel using a pool of processes
+
+    Each source is loaded with :func:`loadSOGraph` in a worker process.
+    Results are yielded in the order of ``sources``. A document that fails
+    to load is reported through the ``error`` of its result and does not
+    stop the batch.
+
+    Args:
+        sources (iterable): Paths or URLs of the RDF documents to load
+        workers (integer): Number of worker processes, defaults to the number of CPUs.
+            With 1 the documents are loaded serially in this process.
+        ntriples (boolean): Return each graph serialized as N-Triples bytes, which
+            is cheaper to transfer from the workers than a pickled graph
+        chunksize (integer): Number of sources sent to a worker per task
+        prefetch (integer): Tasks queued per worker ahead of the consumer
+        **kwargs: ``normalize``, ``deslop`` and ``format``, passed to :func:`loadSOGraph`
+
+    Returns:
+        iterator of SOGraphResult: ``(source, graph, error)`` for each source
+
+    Example::
+
+        for source, g, error in loadSOGraphs(filenames, workers=4):
+            if error is None:
+                print(source, getDatasetIdentifiers(g))
+
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for chunk in _chunked(sources, chunksize):
+            for source, (g, error) in zip(chunk, _loadSOGraphChunk(chunk, ntriples, kwargs)):
+                if error is not None:
+                    logger.warning(f"Failed to load {source}: {error}")
+                yield SOGraphResult(source, g, error)
+        return
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+    pending = collections.deque()
+    try:
+
+        def _results(chunk, future):
+            try:
+                loaded = future.result()
+            except Exception as e:
+                # e.g. a result that could not be pickled
+                loaded = [(None, e)] * len(chunk)
+            for source, (g, error) in zip(chunk, loaded):
+                if error is not None:
+                    logger.warning(f"Failed to load {source}: {error}")
+                yield SOGraphResult(source, g, error)
+
+        for chunk in _chunked(sources, chunksize):
+            pending.append(
+                (chunk, executor.submit(_loadSOGraphChunk, chunk, ntriples, kwargs))
+            )
+            if len(pending) >= workers * prefetch:
+                yield from _results(*pending.popleft())
+        while len(pending) > 0:
+            yield from _results(*pending.popleft())
+    finally:
+        # Tasks not yet started when the consumer stops early are dropped,
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,197 @@
+"""
+Opt-in timing and counting of the stages of loading and extracting
+
+Instrumentation is disabled by default, in which case a span costs a
+function call and a flag check. Enable it with :func:`enableMetrics`, or by
+setting the ``SOTOOLS_METRICS`` environment variable to ``1`` for worker
+processes. Stage names used by sotools are:
+
+- ``extract_jsonld`` -- finding and decoding JSON-LD in HTML
+- ``parse`` -- parsing JSON-LD into a graph, including term normalization
+- ``identifiers``, ``metadata``, ``summary`` -- Dataset extraction
+- ``meta_validate``, ``validate`` -- SHACL validation
+
+Counters are ``documents``, ``triples``, ``jsonld_blocks``,
+``datasets`` and ``terms_rewritten``, the number of terms in loaded
+triples changed by schema.org namespace normalization or desloppifying.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+_enabled = os.environ.get("SOTOOLS_METRICS", "") == "1"
+_lock = threading.Lock()
+_NULL_SPAN = contextlib.nullcontext()
+
+# name: [calls, total seconds, max seconds]
+_timers = {}
+_counters = {}
+_callbacks = []
+
+
+def enableMetrics(enabled=True):
+    """
+    Turn the collection of metrics on or off
+
+    Args:
+        enabled (boolean): Collect metrics
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def metricsEnabled():
+    return _enabled
+
+
+def resetMetrics():
+    """
+    Clear the collected timers and counters
+    """
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def addMetricsCallback(callback):
+    """
+    Call ``callback(name, seconds)`` at the end of each span
+
+    Callbacks are only called while metrics are enabled, e.g. to forward
+    timings to another metrics system.
+    """
+    _callbacks.append(callback)
+
+
+def removeMetricsCallback(callback):
+    _callbacks.remove(callback)
+
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        with _lock:
+            timer = _timers.get(self.name)
+            if timer is None:
+                _timers[self.name] = [1, elapsed, elapsed]
+            else:
+                timer[0] += 1
+                timer[1] += elapsed
+                if elapsed > timer[2]:
+                    timer[2] = elapsed
+        for callback in _callbacks:
+            callback(self.name, elapsed)
+        return False
+
+
+def span(name):
+    """
+    Context manager timing a stage
+
+    Example::
+
+        with span("my_stage"):
+            ...
+
+    Args:
+        name (string): Stage name
+
+    Returns:
+        context manager: A no-op when metrics are disabled
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def countMetric(name, n=1):
+    """
+    Add n to the counter name, when metrics are enabled
+    """
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def _cacheStats():
+    # Read at export time, the caches keep their own statistics
+    import sys
+
+    stats = {}
+    loading = sys.modules.get("sotools.loading")
+    if loading is not None:
+        stats["term_rewrite"] = loading.termCacheInfo()._asdict()
+    extraction = sys.modules.get("sotools.extraction")
+    if extraction is not None:
+        stats["prepared_query"] = extraction._preparedQuery.cache_info()._asdict()
+    return stats
+
+
+def getMetrics():
+    """
+    Snapshot of the collected metrics
+
+    Returns:
+        dict: ``{timers: {name: {calls, seconds, max_seconds}}, counters: {name: n},
+        caches: {name: {hits, misses, maxsize, currsize}}}``
+    """
+    with _lock:
+        timers = {
+            name: {"calls": t[0], "seconds": t[1], "max_seconds": t[2]}
+            for name, t in _timers.items()
+        }
+        counters = dict(_counters)
+    return {"timers": timers, "counters": counters, "caches": _cacheStats()}
+
+
+def metricsToJson(**kwargs):
+    """
+    The metrics of :func:`getMetrics` as JSON text
+
+    Args:
+        **kwargs: Passed to ``json.dumps``
+    """
+    return json.dumps(getMetrics(), **kwargs)
+
+
+def metricsToPrometheus(prefix="sotools"):
+    """
+    The metrics of :func:`getMetrics` in the Prometheus text exposition format
+
+    Args:
+        prefix (string): Prefix of the metric names
+
+    Returns:
+        string: Metrics text
+    """
+    m = getMetrics()
+    lines = [
+        f"# TYPE {prefix}_stage_calls_total counter",
+        f"# TYPE {prefix}_stage_seconds_total counter",
+        f"# TYPE {prefix}_stage_max_seconds gauge",
+    ]
+    for name, t in sorted(m["timers"].items()):
+        lines.append(f'{prefix}_stage_calls_total{{stage="{name}"}} {t["calls"]}')
+        lines.append(f'{prefix}_stage_seconds_total{{stage="{name}"}} {t["seconds"]:.6f}')
+        lines.append(f'{prefix}_stage_max_seconds{{stage="{name}"}} {t["max_seconds"]:.6f}')
+    for name, n in sorted(m["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {n}")
+    for key, kind in (("hits", "counter"), ("misses", "counter"), ("currsize", "gauge")):
+        lines.append(f"# TYPE {prefix}_cache_{key} {kind}")
+        for name, stats in sorted(m["caches"].items()):
+            lines.append(f'{prefix}_cache_{key}{{cache="{name}"}} {stats[key]}')
+    return "\n".join(lines) + "\n"
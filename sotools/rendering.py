@@ -0,0 +1,254 @@
+"""
+Rendering graphs for display in notebooks
+"""
+
+import collections
+import html
+import io
+from rdflib import BNode, Literal, RDF
+
+# Longest literal value shown in a node label
+LABEL_LENGTH = 60
+
+_NODE = (
+    "{id} [ shape=none, label=< <table color='#666666' cellborder='0' "
+    "cellspacing='0' border='1'><tr><td colspan='2' bgcolor='grey'><B>{title}</B>"
+    "</td></tr>{rows}</table> > ] ;\n"
+)
+_ROW = "<tr><td align='left'>{}</td><td align='left'>{}</td></tr>"
+_EDGE = (
+    "\t{} -> {} [ label=< <font point-size='10' color='#336633'>{}</font> > ] ;\n"
+)
+
+
+def _qname(g, x):
+    try:
+        prefix, _, name = g.namespace_manager.compute_qname(x, generate=False)
+        return f"{prefix}:{name}" if prefix else name
+    except Exception:
+        return str(x)
+
+
+def _text(value):
+    value = str(value)
+    if len(value) > LABEL_LENGTH:
+        value = value[: LABEL_LENGTH - 3] + "..."
+    return html.escape(value)
+
+
+def _writeNode(out, node_id, title, rows):
+    out.write(
+        _NODE.format(
+            id=node_id,
+            title=_text(title),
+            rows="".join(_ROW.format(_text(k), _text(v)) for k, v in rows),
+        )
+    )
+
+
+def _literalRows(g, x, max_literals):
+    rows = []
+    n = 0
+    for p, o in g.predicate_objects(x):
+        if isinstance(o, Literal):
+            n += 1
+            if len(rows) < max_literals:
+                rows.append((_qname(g, p), f'"{o}"'))
+    if n > len(rows):
+        rows.append(("...", f"{n - len(rows)} more"))
+    return rows
+
+
+def _title(g, x):
+    types = sorted(_qname(g, t) for t in g.objects(x, RDF.type))
+    name = "[]" if isinstance(x, BNode) else _qname(g, x)
+    if len(types) > 0:
+        return f"{name} a {', '.join(types)}"
+    return name
+
+
+def _isLeaf(g, x):
+    # Has literal or type properties only. Nodes without any properties,
+    # e.g. sameAs or license IRIs, are not leaves so that each is shown.
+    n = 0
+    for p, o in g.predicate_objects(x):
+        if p != RDF.type and not isinstance(o, Literal):
+            return False
+        n += 1
+    return n > 0
+
+
+def writeDot(g, out, root=None, max_depth=3, max_nodes=500, max_literals=5):
+    """
+    Write a size limited DOT rendering of g to a stream
+
+    Nodes are visited breadth first from root, or from all subjects when
+    root is None, until max_depth links from the root or max_nodes nodes
+    are reached. Each node shows at most max_literals of its literal
+    properties. Leaf nodes, which have only literal and type properties,
+    with the same type reached from a node through the same property are
+    collapsed into a single node with a count, which counts as one node of
+    the budget. Nodes without properties, such as sameAs or license IRIs,
+    are shown one by one. Links to nodes beyond the budget are summarized
+    per node in a "N more" note, which is not counted. Lines are written as
+    nodes are visited, so the DOT text is never held in memory as a whole.
+
+    Args:
+        g (Graph): The graph to render
+        out (stream): Text stream receiving the DOT output
+        root (URIRef or BNode): Node to start from
+        max_depth (integer): Maximum number of links from root
+        max_nodes (integer): Maximum number of nodes rendered
+        max_literals (integer): Maximum literal properties shown per node
+
+    Returns:
+        integer: Number of nodes rendered, including collapsed nodes
+    """
+    ids = {}
+    out.write('digraph { \n node [ fontname="DejaVu Sans" ] ; \n')
+
+    def nodeId(x):
+        if x not in ids:
+            ids[x] = f"node{len(ids)}"
+            _writeNode(out, ids[x], _title(g, x), _literalRows(g, x, max_literals))
+        return ids[x]
+
+    if root is None:
+        todo = collections.deque((s, 0) for s in dict.fromkeys(g.subjects()))
+    else:
+        todo = collections.deque([(root, 0)])
+    expanded = set()
+    n_collapsed = 0
+    while len(todo) > 0:
+        x, depth = todo.popleft()
+        if x in expanded:
+            continue
+        if x not in ids and len(ids) + n_collapsed >= max_nodes:
+            continue
+        expanded.add(x)
+        source = nodeId(x)
+        if depth >= max_depth:
+            continue
+        groups = collections.defaultdict(list)
+        for p, o in g.predicate_objects(x):
+            if p == RDF.type or isinstance(o, Literal):
+                continue
+            if o not in ids and _isLeaf(g, o):
+                groups[(p, tuple(sorted(g.objects(o, RDF.type))))].append(o)
+            else:
+                groups[(p, None)].append(o)
+        omitted = 0
+        for (p, leaf_types), objects in groups.items():
+            if leaf_types is not None and len(objects) > 1:
+                if len(ids) + n_collapsed >= max_nodes:
+                    omitted += len(objects)
+                    continue
+                n_collapsed += 1
+                collapsed = f"collapsed{n_collapsed}"
+                types = ", ".join(_qname(g, t) for t in leaf_types) or "nodes"
+                _writeNode(
+                    out,
+                    collapsed,
+                    f"{len(objects)} x {types}",
+                    _literalRows(g, objects[0], max_literals),
+                )
+                out.write(_EDGE.format(source, collapsed, _text(_qname(g, p))))
+                continue
+            for o in objects:
+                if o not in ids and len(ids) + n_collapsed >= max_nodes:
+                    omitted += 1
+                    continue
+                out.write(_EDGE.format(source, nodeId(o), _text(_qname(g, p))))
+                todo.append((o, depth + 1))
+        if omitted > 0:
+            out.write(
+                f'\t{source}_more [ shape=note, label="{omitted} more" ] ;\n'
+                f"\t{source} -> {source}_more [ style=dashed ] ;\n"
+            )
+    out.write("}\n")
+    return len(ids) + n_collapsed
+
+
+def writeTypeSummaryDot(g, out):
+    """
+    Write a DOT rendering of g with one node per rdf:type
+
+    Each node shows the number of instances of the type, each edge the
+    number of links with a property between instances of two types. Untyped
+    nodes are counted as ``(untyped)``.
+
+    Args:
+        g (Graph): The graph to summarize
+        out (stream): Text stream receiving the DOT output
+
+    Returns:
+        integer: Number of types rendered
+    """
+    untyped = ("(untyped)",)
+    types = {}
+    for s, t in g.subject_objects(RDF.type):
+        types.setdefault(s, []).append(_qname(g, t))
+    instances = collections.Counter()
+    links = collections.Counter()
+    for s in dict.fromkeys(g.subjects()):
+        for t in types.get(s, untyped):
+            instances[t] += 1
+    for s, p, o in g:
+        if p == RDF.type or isinstance(o, Literal):
+            continue
+        for ts in types.get(s, untyped):
+            for to in types.get(o, untyped):
+                links[(ts, _qname(g, p), to)] += 1
+    ids = {t: f"type{i}" for i, t in enumerate(sorted(instances))}
+    out.write('digraph { \n node [ fontname="DejaVu Sans" ] ; \n')
+    for t, node_id in ids.items():
+        _writeNode(out, node_id, t, [("instances", instances[t])])
+    for (ts, p, to), n in sorted(links.items()):
+        if to not in ids:
+            ids[to] = f"type{len(ids)}"
+            _writeNode(out, ids[to], to, [])
+        out.write(_EDGE.format(ids[ts], ids[to], _text(f"{p} ({n})")))
+    out.write("}\n")
+    return len(instances)
+
+
+def renderGraph(g, root=None, max_depth=None, max_nodes=None, summary=False):
+    """
+    For rendering an rdflib graph in Jupyter notebooks
+
+    Without options the whole graph is rendered with rdflib's ``rdf2dot``.
+    For large graphs give a root and budget, see :func:`writeDot`, or
+    render a summary with one node per type, see :func:`writeTypeSummaryDot`.
+
+    Args:
+        g (Graph): The graph to render
+        root (URIRef or BNode): Render the part of g reachable from root
+        max_depth (integer): Maximum number of links from root, default 3
+        max_nodes (integer): Maximum number of nodes rendered, default 500
+        summary (boolean): Render one node per rdf:type with counts
+
+    Returns:
+        Jupyter cell: Output for rendering directly in the notebook
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_rendergraph_01.py
+    """
+    import graphviz
+
+    fp = io.StringIO()
+    if summary:
+        writeTypeSummaryDot(g, fp)
+    elif root is not None or max_depth is not None or max_nodes is not None:
+        writeDot(
+            g,
+            fp,
+            root=root,
+            max_depth=3 if max_depth is None else max_depth,
+            max_nodes=500 if max_nodes is None else max_nodes,
+        )
+    else:
+        from rdflib.tools import rdf2dot
+
+        rdf2dot.rdf2dot(g, fp)
+    return graphviz.Source(fp.getvalue())
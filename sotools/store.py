@@ -0,0 +1,390 @@
+"""
+Persistent SQLite store for harvested graphs, and bulk loading
+"""
+
+import contextlib
+import functools
+import itertools
+import sqlite3
+from rdflib import BNode, ConjunctiveGraph, Graph, Literal, URIRef
+from rdflib.plugins.parsers.ntriples import W3CNTriplesParser
+from rdflib.store import Store, VALID_STORE
+from .loading import SCHEMA_ORG, SO_PREFIX
+
+
+# Identifier of the default graph of a persistent store
+STORE_DEFAULT_GRAPH = URIRef("urn:x-rdflib:default")
+
+
+def _encodeTerm(t):
+    # N3 can not represent the invalid IRIs common in harvested content,
+    # so terms are stored as a type character followed by the value
+    if isinstance(t, Literal):
+        return f"L{t.language or ''}\x1f{t.datatype or ''}\x1f{t}"
+    if isinstance(t, BNode):
+        return "B" + t
+    return "U" + t
+
+
+@functools.lru_cache(maxsize=65536)
+def _decodeTerm(v):
+    if v[0] == "L":
+        lang, datatype, value = v[1:].split("\x1f", 2)
+        return Literal(value, lang=lang or None, datatype=datatype or None)
+    if v[0] == "B":
+        return BNode(v[1:])
+    return URIRef(v[1:])
+
+
+class SQLiteStore(Store):
+    """
+    Persistent, context aware rdflib store in a SQLite database
+
+    Quads are kept in a single table with indexes for subject, predicate
+    and object lookups, and results are read from the database as they are
+    iterated, so memory use does not grow with the size of the store.
+    Changes are written when :meth:`commit` or ``close()`` is called.
+
+    The store is registered as the rdflib store plugin ``"SOSQLite"``.
+    Usually it is created with :func:`openSOStore`.
+
+    Args:
+        configuration (string): Path of the database file, opened if provided
+    """
+
+    context_aware = True
+    formula_aware = False
+    graph_aware = True
+    transaction_aware = True
+
+    def __init__(self, configuration=None, identifier=None):
+        self._db = None
+        super(SQLiteStore, self).__init__(configuration=configuration, identifier=identifier)
+
+    def open(self, configuration, create=True):
+        self._db = sqlite3.connect(configuration, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS quad (
+                s TEXT NOT NULL, p TEXT NOT NULL, o TEXT NOT NULL, g TEXT NOT NULL,
+                PRIMARY KEY (s, p, o, g)
+            ) WITHOUT ROWID"""
+        )
+        self._createIndexes()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS namespace (prefix TEXT PRIMARY KEY, uri TEXT NOT NULL)"
+        )
+        self._db.commit()
+        return VALID_STORE
+
+    @contextlib.contextmanager
+    def bulk(self, defer_indexes=True):
+        """
+        Context for loading many quads in a single transaction
+
+        The transaction is committed when the context exits normally and
+        rolled back when it exits with an exception. Durability is relaxed
+        during the load, and optionally the secondary indexes are dropped
+        and rebuilt once at the end, which is much faster than maintaining
+        them for every insert. Only worth deferring indexes when the load is
+        large compared with the existing content.
+
+        Args:
+            defer_indexes (boolean): Rebuild the secondary indexes after loading
+        """
+        self._db.commit()
+        self._db.execute("PRAGMA synchronous=OFF")
+        if defer_indexes:
+            for index in ("quad_pos", "quad_os", "quad_g"):
+                self._db.execute(f"DROP INDEX IF EXISTS {index}")
+        try:
+            yield self
+            self._db.commit()
+        except BaseException:
+            # None of the load is kept when it fails partway
+            self._db.rollback()
+            raise
+        finally:
+            self._createIndexes()
+            self._db.commit()
+            self._db.execute("PRAGMA synchronous=NORMAL")
+
+    def _createIndexes(self):
+        self._db.execute("CREATE INDEX IF NOT EXISTS quad_pos ON quad(p, o, s)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS quad_os ON quad(o, s)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS quad_g ON quad(g)")
+
+    def close(self, commit_pending_transaction=True):
+        if self._db is not None:
+            if commit_pending_transaction:
+                self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def _where(self, triple, context):
+        clauses = []
+        args = []
+        for column, t in zip(("s", "p", "o"), triple):
+            if t is not None:
+                clauses.append(f"{column}=?")
+                args.append(_encodeTerm(t))
+        if context is not None:
+            clauses.append("g=?")
+            args.append(_encodeTerm(getattr(context, "identifier", context)))
+        if len(clauses) == 0:
+            return "", args
+        return " WHERE " + " AND ".join(clauses), args
+
+    def add(self, triple, context, quoted=False):
+        Store.add(self, triple, context, quoted=quoted)
+        self.addN([(triple[0], triple[1], triple[2], context)])
+
+    def addN(self, quads):
+        self._db.executemany(
+            "INSERT OR IGNORE INTO quad VALUES (?,?,?,?)",
+            (
+                (
+                    _encodeTerm(s),
+                    _encodeTerm(p),
+                    _encodeTerm(o),
+                    _encodeTerm(getattr(c, "identifier", c)),
+                )
+                for s, p, o, c in quads
+            ),
+        )
+
+    def remove(self, triple, context=None):
+        where, args = self._where(triple, context)
+        self._db.execute("DELETE FROM quad" + where, args)
+
+    def _contexts(self, s, p, o):
+        for (g,) in self._db.execute(
+            "SELECT g FROM quad WHERE s=? AND p=? AND o=?", (s, p, o)
+        ):
+            yield Graph(store=self, identifier=_decodeTerm(g))
+
+    def triples(self, triple_pattern, context=None):
+        where, args = self._where(triple_pattern, context)
+        if context is None:
+            # Union of all graphs, each triple once
+            cursor = self._db.execute("SELECT DISTINCT s, p, o FROM quad" + where, args)
+            for s, p, o in cursor:
+                yield (
+                    (_decodeTerm(s), _decodeTerm(p), _decodeTerm(o)),
+                    self._contexts(s, p, o),
+                )
+            return
+        cursor = self._db.execute("SELECT s, p, o FROM quad" + where, args)
+        for s, p, o in cursor:
+            yield (_decodeTerm(s), _decodeTerm(p), _decodeTerm(o)), iter((context,))
+
+    def __len__(self, context=None):
+        if context is None:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quad)"
+            ).fetchone()[0]
+        where, args = self._where((None, None, None), context)
+        return self._db.execute("SELECT COUNT(*) FROM quad" + where, args).fetchone()[0]
+
+    def contexts(self, triple=None):
+        where, args = self._where(triple or (None, None, None), None)
+        for (g,) in self._db.execute("SELECT DISTINCT g FROM quad" + where, args).fetchall():
+            yield Graph(store=self, identifier=_decodeTerm(g))
+
+    def add_graph(self, graph):
+        # Graphs exist as long as they hold triples
+        pass
+
+    def remove_graph(self, graph):
+        self.remove((None, None, None), graph)
+
+    def bind(self, prefix, namespace, override=True):
+        if override:
+            self._db.execute("DELETE FROM namespace WHERE uri=?", (str(namespace),))
+            self._db.execute(
+                "INSERT OR REPLACE INTO namespace VALUES (?,?)", (prefix, str(namespace))
+            )
+        else:
+            self._db.execute(
+                "INSERT OR IGNORE INTO namespace VALUES (?,?)", (prefix, str(namespace))
+            )
+
+    def namespace(self, prefix):
+        row = self._db.execute(
+            "SELECT uri FROM namespace WHERE prefix=?", (prefix,)
+        ).fetchone()
+        return None if row is None else URIRef(row[0])
+
+    def prefix(self, namespace):
+        row = self._db.execute(
+            "SELECT prefix FROM namespace WHERE uri=?", (str(namespace),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def namespaces(self):
+        for prefix, uri in self._db.execute("SELECT prefix, uri FROM namespace").fetchall():
+            yield prefix, URIRef(uri)
+
+
+def openSOStore(path):
+    """
+    Open or create a persistent corpus of graphs in a SQLite database
+
+    The returned graph is the union of the named graphs in the store, so
+    :func:`hasDataset`, :func:`getDatasetIdentifiers`,
+    :func:`getDatasetMetadataLinks` and the other helpers evaluate across
+    the whole corpus. Use ``corpus.get_context(URIRef(url))`` to work with a
+    single source. Add graphs with :func:`storeSOGraph`.
+
+    Args:
+        path (string): Path of the database file
+
+    Returns:
+        ConjunctiveGraph: Graph backed by a :class:`SQLiteStore`
+
+    Example::
+
+        corpus = openSOStore("harvest.sqlite")
+        for url in urls:
+            storeSOGraph(corpus, loadSOGraphFromUrl(url), url)
+        print(hasDataset(corpus))
+        print(getDatasetIdentifiers(corpus.get_context(URIRef(urls[0]))))
+        corpus.close()
+
+    """
+    store = SQLiteStore(path)
+    corpus = ConjunctiveGraph(store=store, identifier=STORE_DEFAULT_GRAPH)
+    corpus.namespace_manager.bind(SO_PREFIX, SCHEMA_ORG, override=True, replace=True)
+    return corpus
+
+
+def storeSOGraph(corpus, g, identifier):
+    """
+    Replace the named graph identifier in corpus with the triples of g
+
+    Args:
+        corpus (ConjunctiveGraph): Graph returned by :func:`openSOStore`
+        g (Graph): Graph to store, e.g. from :func:`loadSOGraphFromUrl`
+        identifier (string): Name of the graph, usually the source url
+
+    Returns:
+        Graph: The named graph in corpus
+    """
+    context = corpus.get_context(URIRef(identifier))
+    corpus.store.remove((None, None, None), context)
+    corpus.store.addN((s, p, o, context) for s, p, o in g)
+    corpus.commit()
+    return context
+
+
+class _ChunkReader:
+    """
+    File like reader over an iterable of bytes or str chunks
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._chunk = b""
+        self._pos = 0
+
+    def read(self, size=-1):
+        parts = []
+        n = 0
+        while size < 0 or n < size:
+            if self._pos >= len(self._chunk):
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                if isinstance(chunk, str):
+                    chunk = chunk.encode("utf-8")
+                self._chunk = chunk
+                self._pos = 0
+                continue
+            end = len(self._chunk) if size < 0 else min(len(self._chunk), self._pos + size - n)
+            parts.append(self._chunk[self._pos : end])
+            n += end - self._pos
+            self._pos = end
+        return b"".join(parts)
+
+
+class _BulkSink:
+    """
+    Collects triples from a parser and adds them to a store in batches
+    """
+
+    def __init__(self, store, context, batch_size):
+        self.store = store
+        self.context = context
+        self.batch_size = batch_size
+        self.batch = []
+        self.count = 0
+
+    def triple(self, s, p, o):
+        self.batch.append((s, p, o, self.context))
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.batch) > 0:
+            self.store.addN(self.batch)
+            self.count += len(self.batch)
+            self.batch = []
+
+
+def bulkLoad(g, source, batch_size=50000, defer_indexes=True):
+    """
+    Add a large number of triples to g in batches
+
+    ``source`` is either an iterable of triples, for example a generator
+    over many page graphs, or an iterable of N-Triples chunks as produced
+    by ``loadSOGraphs(..., ntriples=True)``. Chunks are treated as one
+    continuous stream and may split lines.
+
+    Triples go straight to ``g.store.addN`` in batches of ``batch_size``.
+    For a :class:`SQLiteStore` the whole load is one transaction, using
+    :meth:`SQLiteStore.bulk`, so the cost of index maintenance is paid once
+    when it completes.
+
+    Args:
+        g (Graph): Target graph, a ConjunctiveGraph adds to its default context
+        source (iterable): Triples, or bytes / str chunks of N-Triples
+        batch_size (integer): Number of triples passed to the store at once
+        defer_indexes (boolean): Rebuild persistent store indexes after loading
+
+    Returns:
+        integer: Number of triples added
+
+    Example::
+
+        corpus = openSOStore("harvest.sqlite")
+        results = loadSOGraphs(filenames, ntriples=True)
+        bulkLoad(corpus, (r.graph for r in results if r.error is None))
+
+    """
+    context = getattr(g, "default_context", g)
+    store = g.store
+    sink = _BulkSink(store, context, batch_size)
+    items = iter(source)
+    first = next(items, None)
+    if first is None:
+        return 0
+    items = itertools.chain([first], items)
+    if isinstance(store, SQLiteStore):
+        loading = store.bulk(defer_indexes=defer_indexes)
+    else:
+        loading = contextlib.nullcontext()
+    with loading:
+        if isinstance(first, (bytes, bytearray, str)):
+            W3CNTriplesParser(sink=sink).parse(_ChunkReader(items))
+        else:
+            for s, p, o in items:
+                sink.triple(s, p, o)
+        sink.flush()
+    return sink.count
@@ -0,0 +1,234 @@
+"""
+Extracting the subgraphs reachable from nodes of a graph
+"""
+
+from rdflib import ConjunctiveGraph, Graph, Literal
+from rdflib.graph import ModificationException
+from rdflib.namespace import NamespaceManager
+from rdflib.store import Store
+
+
+def _subgraphTriples(g, subjects, max_depth=100, visited=None):
+    """
+    Breadth first traversal of g from subjects
+
+    Each node is expanded once, so the cost is linear in the size of the
+    result.
+
+    Args:
+        g (Graph): The graph to traverse
+        subjects (iterable): Root nodes of the traversal
+        max_depth (integer): Maximum distance from a root of expanded nodes
+        visited (set): Nodes already expanded, updated in place
+
+    Returns:
+        iterator of triples: Triples with a reachable node as subject
+    """
+    if visited is None:
+        visited = set()
+    frontier = []
+    for s in subjects:
+        if s not in visited:
+            visited.add(s)
+            frontier.append(s)
+    depth = 0
+    while len(frontier) > 0:
+        next_frontier = []
+        for s in frontier:
+            for trip in g.triples((s, None, None)):
+                yield trip
+                o = trip[2]
+                if not isinstance(o, Literal) and o not in visited:
+                    visited.add(o)
+                    next_frontier.append(o)
+        depth += 1
+        if depth > max_depth:
+            break
+        frontier = next_frontier
+
+
+def inflateSubgraph(g, sg, ts, depth=0, max_depth=100):
+    """
+    Inflate the subgraph sg to contain all children of sg appearing in g.
+
+    Args:
+        g (Graph): The master graph from which the subgraph is extracted
+        sg (Graph): The subgraph, modified in place
+        ts (iterable of triples): list of triples, the objects of which identify subjects to copy frmm g
+        depth (integer): depth of the subjects of ts below the root
+        max_depth (integer): maximum depth for retrieving terms
+
+    Returns:
+        None
+    """
+    visited = set(sg.subjects())
+    objects = [t[2] for t in ts if not isinstance(t[2], Literal)]
+    sg += _subgraphTriples(g, objects, max_depth=max_depth - depth - 1, visited=visited)
+    return
+
+
+def getSubgraphs(g, subjects, max_depth=100):
+    """
+    Retrieve the subgraph of g reachable from any of subjects.
+
+    All roots are extracted in a single traversal, with nodes shared
+    between them expanded once.
+
+    Args:
+        g (Graph): Source graph
+        subjects (iterable of URIRef): Subjects of the roots of the subgraph to retrieve
+        max_depth (integer): Maximum depth of nodes followed from a root
+
+    Returns:
+        (Graph) The union of the subgraphs of g with subjects.
+    """
+    sg = ConjunctiveGraph()
+    sg.namespace_manager = NamespaceManager(g)
+    sg += _subgraphTriples(g, subjects, max_depth=max_depth)
+    return sg
+
+
+def getSubgraph(g, subject, max_depth=100):
+    """
+    Retrieve the subgraph of g with subject.
+
+    Given the graph ``g``, extract the subgraph identified
+    as the object of the triple with subject ``subject``.
+
+    Args:
+        g (Graph): Source graph
+        subject (URIRef): Subject of the root of the subgraph to retrieve
+        max_depth (integer): Maximum depth of nodes followed from subject
+
+    Returns:
+        (Graph) The subgraph of g with subject.
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_getsubgraph_01.py
+
+    """
+    return getSubgraphs(g, [subject], max_depth=max_depth)
+
+
+class _SubgraphStore(Store):
+    """
+    Read only store exposing the triples of graph with subjects in nodes
+
+    Lookups are answered from the indexes of graph, nothing is copied.
+    """
+
+    def __init__(self, graph, nodes):
+        super(_SubgraphStore, self).__init__()
+        self.graph = graph
+        self.nodes = nodes
+        self._namespace = {}
+        self._prefix = {}
+        for prefix, namespace in graph.namespaces():
+            self.bind(prefix, namespace)
+
+    def triples(self, triple_pattern, context=None):
+        s, p, o = triple_pattern
+        if s is not None:
+            subjects = (s,) if s in self.nodes else ()
+        elif o is not None:
+            # Bound objects are selective, filter the matches in the parent
+            for trip in self.graph.triples((None, p, o)):
+                if trip[0] in self.nodes:
+                    yield trip, iter(())
+            return
+        else:
+            subjects = self.nodes
+        for subject in subjects:
+            for trip in self.graph.triples((subject, p, o)):
+                yield trip, iter(())
+
+    def __len__(self, context=None):
+        return sum(1 for _ in self.triples((None, None, None)))
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def add(self, triple, context, quoted=False):
+        raise ModificationException()
+
+    def addN(self, quads):
+        raise ModificationException()
+
+    def remove(self, triple, context=None):
+        raise ModificationException()
+
+    def bind(self, prefix, namespace, override=True):
+        if not override and prefix in self._namespace:
+            return
+        self._namespace[prefix] = namespace
+        self._prefix[namespace] = prefix
+
+    def namespace(self, prefix):
+        return self._namespace.get(prefix)
+
+    def prefix(self, namespace):
+        return self._prefix.get(namespace)
+
+    def namespaces(self):
+        for prefix, namespace in self._namespace.items():
+            yield prefix, namespace
+
+
+class SubgraphView(Graph):
+    """
+    Read only view of the part of a graph reachable from one or more roots
+
+    The view records only the set of expanded nodes. ``triples()``,
+    ``query()``, ``serialize()`` and iteration are answered lazily from the
+    indexes of the parent graph, so creating a view costs about the size of
+    the node set. Use :meth:`materialize` for an independent copy.
+
+    Args:
+        graph (Graph): The parent graph
+        nodes (iterable): Subjects of the triples included in the view
+    """
+
+    def __init__(self, graph, nodes):
+        self.parent = graph
+        self.nodes = frozenset(nodes)
+        super(SubgraphView, self).__init__(
+            store=_SubgraphStore(graph, self.nodes), bind_namespaces="none"
+        )
+
+    def materialize(self):
+        """
+        Copy the triples of the view to a new graph
+
+        Returns:
+            ConjunctiveGraph: Graph with the triples of the view
+        """
+        sg = ConjunctiveGraph()
+        sg.namespace_manager = NamespaceManager(self.parent)
+        sg += self
+        return sg
+
+
+def getSubgraphView(g, subject, max_depth=100):
+    """
+    Retrieve a read only view of the subgraph of g with subject.
+
+    Same content as :func:`getSubgraph` without copying triples.
+
+    Args:
+        g (Graph): Source graph
+        subject (URIRef): Subject of the root of the subgraph
+        max_depth (integer): Maximum depth of nodes followed from subject
+
+    Returns:
+        SubgraphView: View of the subgraph of g with subject
+
+    Example::
+
+        for dataset in g.subjects(RDF.type, SO.Dataset):
+            record = getSubgraphView(g, dataset)
+            print(record.serialize(format="json-ld"))
+
+    """
+    nodes = set(trip[0] for trip in _subgraphTriples(g, [subject], max_depth=max_depth))
+    return SubgraphView(g, nodes)
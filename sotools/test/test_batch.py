@@ -0,0 +1,44 @@
+"""
+Tests for loading many documents with loadSOGraphs
+
+Run with::
+
+  $ pytest
+
+"""
+import os.path
+from rdflib import ConjunctiveGraph
+import sotools.common
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../docsource/source/examples/data/"
+)
+
+test_data = [
+    os.path.join(test_data_folder, "id_literal.json"),
+    os.path.join(test_data_folder, "id_structured_01.json"),
+    os.path.join(test_data_folder, "no_such_file.json"),
+    os.path.join(test_data_folder, "ds_m_encoding.json"),
+]
+
+
+class TestLoadSOGraphs:
+    def test_ordered(self):
+        res = list(sotools.common.loadSOGraphs(test_data, workers=2, chunksize=1))
+        assert [r.source for r in res] == test_data
+        assert res[2].graph is None
+        assert res[2].error is not None
+        for r in (res[0], res[1], res[3]):
+            assert r.error is None
+            expected = sotools.common.loadSOGraph(filename=r.source)
+            assert len(r.graph) == len(expected)
+        ids = sotools.common.getDatasetIdentifiers(res[0].graph)
+        assert ids[0]["value"] == "simple_literal_string"
+
+    def test_ntriples(self):
+        res = list(sotools.common.loadSOGraphs(test_data, workers=1, ntriples=True))
+        assert len(res) == len(test_data)
+        g = ConjunctiveGraph()
+        g.parse(data=res[1].graph, format="nt")
+        ids = sotools.common.getDatasetIdentifiers(g)
+        assert ids[0]["propertyId"] == "DOI"
@@ -0,0 +1,109 @@
+"""
+Tests for the sotools command line
+
+Run with::
+
+  $ pytest
+
+"""
+import os.path
+import pstats
+import pytest
+import sotools.cli
+import sotools.metrics
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../docsource/source/examples/data/"
+)
+shapes_folder = os.path.join(os.path.dirname(__file__), "../data/shapes/")
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+class TestProfile:
+    def test_cprofile(self, tmp_path, capsys):
+        output = str(tmp_path / "page.prof")
+        status = sotools.cli.main(
+            [
+                "profile",
+                os.path.join(test_data_folder, "ds_landing_page.html"),
+                "--output",
+                output,
+                "--top",
+                "5",
+            ]
+        )
+        assert status == 0
+        out = capsys.readouterr().out
+        assert "triples: 12" in out
+        assert "JSON-LD blocks: 2" in out
+        assert "identifiers: 1" in out
+        assert "metadata links: 1" in out
+        # The terms of the first block, which uses the http://schema.org vocabulary
+        assert "rewritten terms: 7" in out
+        for stage in ("extract_jsonld", "parse", "identifiers", "metadata"):
+            assert f"\n{stage} " in out
+        assert pstats.Stats(output).total_calls > 0
+        # The previous metrics setting is restored
+        assert not sotools.metrics.metricsEnabled()
+
+    def test_sample(self, tmp_path, capsys):
+        output = str(tmp_path / "ds.folded")
+        status = sotools.cli.main(
+            [
+                "profile",
+                os.path.join(test_data_folder, "ds_m_encoding.json"),
+                "--profiler",
+                "sample",
+                "--output",
+                output,
+                "--shacl",
+                os.path.join(shapes_folder, "ds_metadata_encoding_shape.ttl"),
+            ]
+        )
+        assert status == 0
+        out = capsys.readouterr().out
+        assert "triples: 11" in out
+        # Only HTML input has JSON-LD blocks
+        assert "JSON-LD blocks: n/a" in out
+        assert "SHACL conforms: True" in out
+        assert "\nvalidate " in out
+        assert os.path.exists(output)
+
+    def test_badArguments(self, capsys):
+        for option in (
+            ["--repeat", "0"],
+            ["--repeat", "-1"],
+            ["--top", "0"],
+            ["--interval", "0"],
+            ["--interval", "-0.5"],
+            ["--sort", "bogus"],
+            ["--inference", "bogus"],
+        ):
+            with pytest.raises(SystemExit) as e:
+                sotools.cli.main(["profile", "ds.json"] + option)
+            assert e.value.code == 2
+            assert option[0] in capsys.readouterr().err
+
+    def test_missingFile(self, capsys):
+        assert sotools.cli.main(["profile", "no-such-file.html"]) == 1
+        assert "no-such-file.html" in capsys.readouterr().err
+
+
+class TestStackSampler:
+    def test_collapsed(self, tmp_path):
+        with sotools.cli.StackSampler(interval=0.001) as sampler:
+            busy(2000000)
+        assert sum(sampler.stacks.values()) > 0
+        assert any("busy (test_cli.py" in s for s in sampler.stacks)
+        own, total, frame = sampler.hotspots(1)[0]
+        assert 0 < own <= total
+        path = tmp_path / "busy.folded"
+        with open(path, "w") as f:
+            sampler.writeCollapsed(f)
+        for line in path.read_text().splitlines():
+            stack, n = line.rsplit(" ", 1)
+            assert int(n) > 0
+            assert ";" in stack
@@ -0,0 +1,131 @@
+"""
+Tests for loading landing pages over HTTP, using a local server
+
+Run with::
+
+  $ pytest
+
+"""
+import http.server
+import os.path
+import threading
+import pytest
+import sotools.common
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../docsource/source/examples/data/"
+)
+
+test_data = {
+    "landing_page": os.path.join(test_data_folder, "ds_landing_page.html"),
+}
+
+
+class LandingPageHandler(http.server.BaseHTTPRequestHandler):
+    # Number of 503 responses sent before /flaky succeeds
+    flaky_failures = 1
+    counts = {}
+    not_modified = 0
+
+    def do_GET(self):
+        count = LandingPageHandler.counts.get(self.path, 0) + 1
+        LandingPageHandler.counts[self.path] = count
+        if self.path == "/missing":
+            self.send_error(404)
+            return
+        if self.path == "/flaky" and count <= LandingPageHandler.flaky_failures:
+            self.send_error(503)
+            return
+        etag = None
+        if self.path.startswith("/etag"):
+            etag = '"v1"'
+            if self.headers.get("If-None-Match") == etag:
+                LandingPageHandler.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        with open(test_data["landing_page"], "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), LandingPageHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestLoadFromUrl:
+    def test_loadFromUrl(self, server):
+        g = sotools.common.loadSOGraphFromUrl(f"{server}/dataset/1")
+        ids = sotools.common.getDatasetIdentifiers(g)
+        assert ids[0]["value"] == "10.5072/example.1"
+
+    def test_notFound(self, server):
+        with pytest.raises(ValueError):
+            sotools.common.loadSOGraphFromUrl(f"{server}/missing")
+
+    def test_retry(self, server):
+        session = sotools.common.createSession(retries=2, backoff=0)
+        g = sotools.common.loadSOGraphFromUrl(f"{server}/flaky", session=session)
+        assert sotools.common.hasDataset(g) == 1
+        assert LandingPageHandler.counts["/flaky"] == 2
+
+    def test_loadFromUrls(self, server):
+        urls = [f"{server}/dataset/{i}" for i in range(10)] + [f"{server}/missing"]
+        res = sotools.common.loadSOGraphsFromUrls(urls, concurrency=4, per_host=2)
+        assert [r.source for r in res] == urls
+        for r in res[:-1]:
+            assert r.error is None
+            assert sotools.common.hasDataset(r.graph) == 1
+        assert res[-1].graph is None
+        assert isinstance(res[-1].error, ValueError)
+
+
+class TestHttpCache:
+    def test_conditionalGet(self, server, tmp_path):
+        cache = sotools.common.HttpCache(str(tmp_path / "cache.sqlite"))
+        url = f"{server}/etag/1"
+        g = sotools.common.loadSOGraphFromUrl(url, cache=cache)
+        assert len(cache) == 1
+        assert cache.validators(url) == {"If-None-Match": '"v1"'}
+        not_modified = LandingPageHandler.not_modified
+        g2 = sotools.common.loadSOGraphFromUrl(url, cache=cache)
+        assert LandingPageHandler.not_modified == not_modified + 1
+        assert len(g2) == len(g)
+        assert sotools.common.getDatasetIdentifiers(g2) == sotools.common.getDatasetIdentifiers(g)
+        # Pages without validators are not cached
+        sotools.common.loadSOGraphFromUrl(f"{server}/dataset/1", cache=cache)
+        assert len(cache) == 1
+        cache.close()
+
+    def test_evictSize(self, server, tmp_path):
+        cache = sotools.common.HttpCache(str(tmp_path / "cache.sqlite"), max_bytes=1)
+        sotools.common.loadSOGraphFromUrl(f"{server}/etag/2", cache=cache)
+        assert len(cache) == 0
+        assert cache.validators(f"{server}/etag/2") == {}
+        cache.close()
+
+    def test_asyncCache(self, server, tmp_path):
+        cache = sotools.common.HttpCache(str(tmp_path / "cache.sqlite"))
+        urls = [f"{server}/etag/async/{i}" for i in range(4)]
+        res = sotools.common.loadSOGraphsFromUrls(urls, cache=cache)
+        assert all(r.error is None for r in res)
+        assert len(cache) == 4
+        res = sotools.common.loadSOGraphsFromUrls(urls, cache=cache)
+        assert all(sotools.common.hasDataset(r.graph) == 1 for r in res)
+        cache.close()
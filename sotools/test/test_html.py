@@ -0,0 +1,96 @@
+"""
+Tests for loading schema.org content embedded in HTML
+
+Run with::
+
+  $ pytest
+
+"""
+import os.path
+import sotools.common
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../docsource/source/examples/data/"
+)
+
+test_data = {
+    "landing_page": os.path.join(test_data_folder, "ds_landing_page.html"),
+}
+
+
+def readTestData(name):
+    with open(test_data[name], "r") as f:
+        return f.read()
+
+
+class TestLoadFromHtml:
+    def test_landingPage(self):
+        html = readTestData("landing_page")
+        g = sotools.common.loadSOGraphFromHtml(html, "https://example.org/dataset/1")
+        assert sotools.common.hasDataset(g) == 1
+        ids = sotools.common.getDatasetIdentifiers(g)
+        assert len(ids) == 1
+        assert ids[0]["value"] == "10.5072/example.1"
+        assert ids[0]["propertyId"] == "DOI"
+        links = sotools.common.getDatasetMetadataLinks(g)
+        assert len(links) == 1
+        assert links[0]["contentUrl"] == "https://example.org/dataset/1/metadata.xml"
+
+
+class TestExtractJsonLd:
+    def test_scannerMatchesExtruct(self):
+        html = readTestData("landing_page")
+        fast = sotools.common.JsonLdScanner().extract(html)
+        assert len(fast) == 2
+        assert fast == sotools.common.extractJsonLd(html, fast=False)
+        assert fast == sotools.common.extractJsonLd(html.encode("utf-8"))
+
+    def test_scannerSkipsComments(self):
+        html = """<html><head>
+        <!-- <script type="application/ld+json">{"@type": "Thing"}</script> -->
+        <SCRIPT TYPE='application/ld+json'>[{"@type": "Dataset"}, {}]</SCRIPT>
+        </head></html>"""
+        assert sotools.common.JsonLdScanner().extract(html) == [{"@type": "Dataset"}]
+
+    def test_fallback(self):
+        # A leading javascript comment is not valid JSON, extruct handles it
+        html = """<html><head><script type="application/ld+json">
+        // dataset metadata
+        {"@type": "Dataset"}
+        </script></head></html>"""
+        assert sotools.common.extractJsonLd(html) == [{"@type": "Dataset"}]
+
+    def test_digest(self):
+        a = sotools.common.extractJsonLd(
+            '<script type="application/ld+json">{"name": "x", "@type": "Dataset"}</script>'
+        )
+        b = sotools.common.extractJsonLd(
+            '<script type="application/ld+json">\n{ "@type": "Dataset",\n  "name": "x" }\n</script>'
+        )
+        assert sotools.common.jsonLdDigest(a) == sotools.common.jsonLdDigest(b)
+        assert sotools.common.jsonLdDigest(a) != sotools.common.jsonLdDigest(
+            [{"@type": "Dataset", "name": "y"}]
+        )
+        # Only absolute references, the page URL does not matter
+        absolute = [{"@id": "https://example.org/ds", "name": "x"}]
+        assert sotools.common.jsonLdDigest(
+            absolute, base="https://example.org/a"
+        ) == sotools.common.jsonLdDigest(absolute, base="https://mirror.org/b")
+
+    def test_digestRelative(self):
+        pages = ("https://example.org/a/", "https://example.org/b/")
+        for items in (
+            [{"@id": "./", "name": "x"}],
+            [{"@graph": [{"@id": "_:b0", "hasPart": [{"@id": "data.csv"}]}]}],
+            [
+                {
+                    "@context": {"url": {"@id": "https://schema.org/url", "@type": "@id"}},
+                    "url": "page.html",
+                }
+            ],
+        ):
+            digests = [sotools.common.jsonLdDigest(items, base=b) for b in pages]
+            assert digests[0] != digests[1]
+        blank = [{"@id": "_:b0", "url": "page.html"}]
+        digests = [sotools.common.jsonLdDigest(blank, base=b) for b in pages]
+        assert digests[0] == digests[1]
@@ -0,0 +1,55 @@
+"""
+Tests for the lazy imports of sotools submodules
+
+Run with::
+
+  $ pytest
+
+"""
+import os
+import subprocess
+import sys
+import sotools
+import sotools.common
+
+HEAVY_MODULES = ("pyshacl", "graphviz", "extruct", "requests", "rdflib.plugins.sparql")
+
+DATA = os.path.join(
+    os.path.dirname(__file__),
+    "../../docsource/source/examples/data/ds_m_encoding.json",
+)
+
+
+def loadedModules(code):
+    # Run code in a fresh interpreter and list the heavy modules it imported
+    script = code + (
+        "\nimport sys\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    res = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return [m for m in res.stdout.strip().split(",") if m != ""]
+
+
+class TestLazyImports:
+    def test_import(self):
+        assert loadedModules("import sotools") == []
+
+    def test_loadAndExtract(self):
+        code = (
+            "import sotools\n"
+            f"g = sotools.loadSOGraph(filename={DATA!r})\n"
+            "assert len(sotools.getDatasetIdentifiers(g)) == 1\n"
+            "assert len(sotools.getDatasetMetadataLinks(g)) == 1\n"
+        )
+        assert loadedModules(code) == []
+
+    def test_validation(self):
+        assert "pyshacl" in loadedModules("import sotools\nsotools.validateSHACL")
+
+    def test_names(self):
+        for name in sotools.common.__all__:
+            assert getattr(sotools, name) is getattr(sotools.common, name)
+        assert "loadSOGraph" in dir(sotools)
+        assert sotools.loadSOGraph.__module__ == "sotools.loading"
@@ -6,6 +6,7 @@ Run with::
   $ pytest
 
 """
+import glob
 import os.path
 import sotools.common
 
@@ -38,3 +39,57 @@ class TestMetadataLinks:
         links = sotools.common.getDatasetMetadataLinks(g)
         assert len(links) == 1
         assert links[0]["contentUrl"] == "https://example.org/my/data/1/metadata.xml"
+
+
+def sortedEntries(entries):
+    return sorted(entries, key=lambda e: sorted((k, str(v)) for k, v in e.items()))
+
+
+class TestDatasetSummary:
+    def test_matchesSparql(self):
+        # The graph walk returns the same entries as the SPARQL helpers
+        for fname in glob.glob(os.path.join(test_data_folder, "*.json")):
+            g = sotools.common.loadSOGraph(filename=fname)
+            links = sotools.common.getDatasetMetadataLinksFromEncoding(g)
+            links += sotools.common.getDatasetMetadataLinksFromSubjectOf(g)
+            links += sotools.common.getDatasetMetadataLinksFromAbout(g)
+            ids = sotools.common.getLiteralDatasetIdentifiers(g)
+            ids += sotools.common.getStructuredDatasetIdentifiers(g)
+            summary = sotools.common.extractDatasetSummary(g)
+            assert sortedEntries(summary["metadata"]) == sortedEntries(links)
+            assert sortedEntries(summary["identifiers"]) == sortedEntries(ids)
+            assert sortedEntries(sotools.common.getDatasetMetadataLinks(g)) == sortedEntries(links)
+            assert sortedEntries(sotools.common.getDatasetIdentifiers(g)) == sortedEntries(ids)
+
+    def test_order(self):
+        # Links through encoding of all Datasets come first, then subjectOf,
+        # then about, as in the SPARQL helpers
+        doc = """{
+          "@context": {"@vocab": "https://schema.org/"},
+          "@graph": [
+            {"@id": "https://example.net/ds0", "@type": "Dataset",
+             "subjectOf": {"url": "https://example.net/ds0/subjectof.xml",
+                           "encodingFormat": "http://www.isotc211.org/2005/gmd"}},
+            {"@id": "https://example.net/about", "@type": "CreativeWork",
+             "about": {"@id": "https://example.net/ds0"},
+             "contentUrl": "https://example.net/ds0/about.xml",
+             "encodingFormat": "http://www.isotc211.org/2005/gmd"},
+            {"@id": "https://example.net/ds1", "@type": "Dataset",
+             "encoding": {"contentUrl": "https://example.net/ds1/encoding.xml",
+                          "encodingFormat": "http://www.isotc211.org/2005/gmd",
+                          "dateModified": "2019-01-01",
+                          "description": "Metadata"}}
+          ]
+        }"""
+        g = sotools.common.loadSOGraph(data=doc)
+        links = sotools.common.getDatasetMetadataLinksFromEncoding(g)
+        links += sotools.common.getDatasetMetadataLinksFromSubjectOf(g)
+        links += sotools.common.getDatasetMetadataLinksFromAbout(g)
+        expected = [
+            "https://example.net/ds1/encoding.xml",
+            "https://example.net/ds0/subjectof.xml",
+            "https://example.net/ds0/about.xml",
+        ]
+        assert [e["contentUrl"] for e in links] == expected
+        assert sotools.common.getDatasetMetadataLinks(g) == links
+        assert sotools.common.extractDatasetSummary(g)["metadata"] == links
@@ -0,0 +1,122 @@
+"""
+Tests for the opt-in instrumentation of sotools stages
+
+Run with::
+
+  $ pytest
+
+"""
+import json
+import pytest
+import sotools.common
+import sotools.metrics
+
+DOC = json.dumps(
+    {
+        "@context": {"@vocab": "http://schema.org/"},
+        "@id": "https://example.net/ds",
+        "@type": "Dataset",
+        "name": "Test",
+        "identifier": {
+            "@type": "PropertyValue",
+            "propertyId": "https://registry.identifiers.org/registry/doi",
+            "value": "doi:10.1234/x",
+        },
+    }
+)
+
+HTML = f"""<html><head>
+<script type="application/ld+json">{DOC}</script>
+</head><body></body></html>"""
+
+
+@pytest.fixture
+def metrics():
+    sotools.metrics.resetMetrics()
+    sotools.metrics.enableMetrics()
+    yield sotools.metrics
+    sotools.metrics.enableMetrics(False)
+    sotools.metrics.resetMetrics()
+
+
+class TestMetrics:
+    def test_disabled(self):
+        assert not sotools.metrics.metricsEnabled()
+        sotools.metrics.resetMetrics()
+        sotools.common.loadSOGraph(data=DOC)
+        m = sotools.metrics.getMetrics()
+        assert m["timers"] == {}
+        assert m["counters"] == {}
+
+    def test_stages(self, metrics):
+        g = sotools.common.loadSOGraphFromHtml(HTML, "https://example.net/")
+        sotools.common.getDatasetIdentifiers(g)
+        sotools.common.extractDatasetSummary(g)
+        m = metrics.getMetrics()
+        for stage in ("extract_jsonld", "parse", "identifiers", "summary"):
+            assert m["timers"][stage]["calls"] == 1
+            assert m["timers"][stage]["seconds"] >= 0
+        assert m["counters"]["documents"] == 1
+        assert m["counters"]["jsonld_blocks"] == 1
+        assert m["counters"]["triples"] == len(g)
+        assert m["counters"]["datasets"] == 1
+        assert m["counters"]["terms_rewritten"] > 0
+        assert "term_rewrite" in m["caches"]
+
+    def test_rewrites(self, metrics):
+        # so:Dataset and so:propertyID, from http and propertyId
+        doc = json.dumps(
+            {
+                "@context": {"@vocab": "http://schema.org/"},
+                "@id": "https://example.net/ds",
+                "@type": "Dataset",
+                "propertyId": "doi",
+            }
+        )
+        for _ in range(2):
+            # The second load finds the terms in the rewrite cache
+            metrics.resetMetrics()
+            sotools.common.loadSOGraph(data=doc)
+            assert metrics.getMetrics()["counters"]["terms_rewritten"] == 2
+        metrics.enableMetrics(False)
+        sotools.common.clearTermCache()
+        sotools.common.loadSOGraph(data=doc)
+        # Terms cached while metrics were off are counted
+        metrics.enableMetrics()
+        metrics.resetMetrics()
+        sotools.common.loadSOGraph(data=doc)
+        assert metrics.getMetrics()["counters"]["terms_rewritten"] == 2
+
+    def test_callback(self, metrics):
+        seen = []
+
+        def callback(name, seconds):
+            seen.append(name)
+
+        metrics.addMetricsCallback(callback)
+        try:
+            with metrics.span("custom"):
+                pass
+        finally:
+            metrics.removeMetricsCallback(callback)
+        with metrics.span("custom"):
+            pass
+        assert seen == ["custom"]
+        assert metrics.getMetrics()["timers"]["custom"]["calls"] == 2
+
+    def test_export(self, metrics):
+        sotools.common.loadSOGraph(data=DOC)
+        metrics.countMetric("documents", 2)
+        m = json.loads(metrics.metricsToJson())
+        assert m["counters"]["documents"] == 3
+        text = metrics.metricsToPrometheus()
+        assert 'sotools_stage_calls_total{stage="parse"} 1' in text
+        assert "sotools_documents_total 3" in text
+        assert "# TYPE sotools_cache_hits counter" in text
+
+    def test_reset(self, metrics):
+        sotools.common.loadSOGraph(data=DOC)
+        metrics.resetMetrics()
+        m = metrics.getMetrics()
+        assert m["timers"] == {}
+        assert m["counters"] == {}
@@ -0,0 +1,93 @@
+"""
+Tests for rendering graphs as DOT
+
+Run with::
+
+  $ pytest
+
+"""
+import io
+import json
+import rdflib
+import sotools.common
+
+EX = rdflib.Namespace("https://example.net/")
+
+
+def catalog(n_datasets, n_distributions):
+    doc = {
+        "@context": {"@vocab": "https://schema.org/"},
+        "@id": "https://example.net/catalog",
+        "@type": "DataCatalog",
+        "dataset": [
+            {
+                "@id": f"https://example.net/ds{i}",
+                "@type": "Dataset",
+                "name": f"Dataset {i}",
+                "distribution": [
+                    {"@type": "DataDownload", "contentUrl": f"https://example.net/ds{i}/{j}"}
+                    for j in range(n_distributions)
+                ],
+            }
+            for i in range(n_datasets)
+        ],
+    }
+    return sotools.common.loadSOGraph(data=json.dumps(doc))
+
+
+class TestWriteDot:
+    def test_budget(self):
+        g = catalog(20, 1)
+        out = io.StringIO()
+        n = sotools.common.writeDot(g, out, root=EX.catalog, max_nodes=5)
+        dot = out.getvalue()
+        assert n == 5
+        assert dot.startswith("digraph {") and dot.endswith("}\n")
+        assert "16 more" in dot
+
+    def test_depth(self):
+        g = catalog(2, 1)
+        out = io.StringIO()
+        # The catalog and its datasets, not the distributions
+        assert sotools.common.writeDot(g, out, root=EX.catalog, max_depth=1) == 3
+
+    def test_collapse(self):
+        g = catalog(1, 50)
+        out = io.StringIO()
+        # The Dataset and one node for its 50 distributions
+        assert sotools.common.writeDot(g, out, root=EX.ds0) == 2
+        assert "50 x" in out.getvalue()
+
+    def test_bareIris(self):
+        g = catalog(1, 0)
+        for i in range(4):
+            g.add((EX.ds0, sotools.common.SO.sameAs, EX[f"same{i}"]))
+        out = io.StringIO()
+        # Nodes without properties are shown one by one, not collapsed
+        assert sotools.common.writeDot(g, out, root=EX.ds0) == 5
+        dot = out.getvalue()
+        for i in range(4):
+            assert f"same{i}" in dot
+        assert " x " not in dot
+
+    def test_budgetCollapsed(self):
+        g = catalog(10, 3)
+        out = io.StringIO()
+        n = sotools.common.writeDot(g, out, root=EX.catalog, max_nodes=6)
+        dot = out.getvalue()
+        assert n == 6
+        # Node and collapsed node definitions, not the "N more" notes
+        assert dot.count("shape=none") == 6
+
+    def test_summary(self):
+        g = catalog(3, 2)
+        out = io.StringIO()
+        assert sotools.common.writeTypeSummaryDot(g, out) == 3
+        dot = out.getvalue()
+        assert "instances" in dot
+        assert "distribution (6)" in dot
+
+    def test_renderGraph(self):
+        g = catalog(3, 2)
+        src = sotools.common.renderGraph(g, root=EX.ds0)
+        assert "DataDownload" in src.source
@@ -7,8 +7,11 @@ Run with::
 
 """
 import os.path
+from rdflib import Literal, Namespace, URIRef
 import sotools.common
 
+SO = Namespace("https://schema.org/")
+
 test_data_folder = os.path.join(
     os.path.dirname(__file__), "../../docsource/source/examples/data/"
 )
@@ -51,3 +54,47 @@ class TestNamespaceNormalization:
         g = sotools.common.loadSOGraph(filename=test_data["https_noslash"])
         qres = g.query(TestNamespaceNormalization.q_dataset)
         assert(len(qres) == 1)
+
+    def test_deslop(self):
+        """
+        Check SO:propertyId => SO:propertyID
+        """
+        g = sotools.common.loadSOGraph(filename=test_data["http"])
+        g.add((URIRef("urn:x"), URIRef("http://schema.org/propertyId"), Literal("DOI")))
+        assert (URIRef("urn:x"), SO.propertyID, Literal("DOI")) in g
+        assert len(list(g.triples((None, URIRef("http://schema.org/propertyId"), None)))) == 0
+
+    def test_rawload(self):
+        """
+        No rewriting when normalize and deslop are off
+        """
+        g = sotools.common.loadSOGraph(
+            filename=test_data["http"], normalize=False, deslop=False
+        )
+        qres = g.query(TestNamespaceNormalization.q_dataset)
+        assert(len(qres) == 0)
+
+    def test_termcache(self):
+        """
+        Repeated terms are served from the rewrite cache
+        """
+        sotools.common.clearTermCache()
+        sotools.common.loadSOGraph(filename=test_data["http"])
+        info = sotools.common.termCacheInfo()
+        assert info.misses > 0
+        sotools.common.loadSOGraph(filename=test_data["http"])
+        info2 = sotools.common.termCacheInfo()
+        assert info2.misses == info.misses
+        assert info2.hits > info.hits
+
+    def test_termcachesize(self):
+        try:
+            sotools.common.setTermCacheSize(2)
+            g = sotools.common.loadSOGraph(filename=test_data["https_noslash"])
+            info = sotools.common.termCacheInfo()
+            assert info.maxsize == 2
+            assert info.currsize <= 2
+            qres = g.query(TestNamespaceNormalization.q_dataset)
+            assert(len(qres) == 1)
+        finally:
+            sotools.common.setTermCacheSize()
@@ -0,0 +1,121 @@
+"""
+Tests for the persistent SQLite corpus store
+
+Run with::
+
+  $ pytest
+
+"""
+import os.path
+import pytest
+from rdflib import BNode, Literal, URIRef, XSD
+import sotools.common
+
+test_data_folder = os.path.join(
+    os.path.dirname(__file__), "../../docsource/source/examples/data/"
+)
+
+test_data = {
+    "literal": os.path.join(test_data_folder, "id_literal.json"),
+    "structured_02": os.path.join(test_data_folder, "id_structured_02.json"),
+    "encoding": os.path.join(test_data_folder, "ds_m_encoding.json"),
+    "about": os.path.join(test_data_folder, "ds_m_about.json"),
+}
+
+
+def sortedEntries(entries):
+    return sorted(entries, key=lambda e: sorted((k, str(v)) for k, v in e.items()))
+
+
+class TestSQLiteStore:
+    def test_corpus(self, tmp_path):
+        path = str(tmp_path / "corpus.sqlite")
+        corpus = sotools.common.openSOStore(path)
+        graphs = {}
+        for name, fname in test_data.items():
+            graphs[name] = sotools.common.loadSOGraph(filename=fname)
+            sotools.common.storeSOGraph(corpus, graphs[name], f"https://example.org/{name}")
+        corpus.close()
+
+        corpus = sotools.common.openSOStore(path)
+        assert len(list(corpus.contexts())) == len(test_data)
+        assert sotools.common.hasDataset(corpus) == sum(
+            sotools.common.hasDataset(g) for g in graphs.values()
+        )
+        for name, g in graphs.items():
+            context = corpus.get_context(URIRef(f"https://example.org/{name}"))
+            assert len(context) == len(g)
+            assert sortedEntries(sotools.common.getDatasetIdentifiers(context)) == sortedEntries(
+                sotools.common.getDatasetIdentifiers(g)
+            )
+            assert sortedEntries(sotools.common.getDatasetMetadataLinks(context)) == sortedEntries(
+                sotools.common.getDatasetMetadataLinks(g)
+            )
+        # Replacing a named graph removes its previous triples
+        sotools.common.storeSOGraph(corpus, graphs["literal"], "https://example.org/about")
+        context = corpus.get_context(URIRef("https://example.org/about"))
+        assert len(context) == len(graphs["literal"])
+        corpus.close()
+
+    def test_terms(self, tmp_path):
+        corpus = sotools.common.openSOStore(str(tmp_path / "corpus.sqlite"))
+        s = BNode()
+        objects = [
+            Literal('multi\nline "quoted"'),
+            Literal("chat", lang="fr"),
+            Literal("2019-12-01", datatype=XSD.date),
+            URIRef("https://example.org/not a valid iri"),
+        ]
+        for o in objects:
+            corpus.add((s, URIRef("https://example.org/p"), o))
+        corpus.commit()
+        assert set(corpus.objects(s, URIRef("https://example.org/p"))) == set(objects)
+        corpus.close()
+
+
+class TestBulkLoad:
+    def test_triples(self, tmp_path):
+        graphs = [sotools.common.loadSOGraph(filename=f) for f in test_data.values()]
+        corpus = sotools.common.openSOStore(str(tmp_path / "corpus.sqlite"))
+        n = sotools.common.bulkLoad(corpus, (t for g in graphs for t in g), batch_size=7)
+        assert n == sum(len(g) for g in graphs)
+        assert len(corpus) == n
+        assert sotools.common.hasDataset(corpus) == 4
+        corpus.close()
+
+    def test_ntriples(self, tmp_path):
+        g = sotools.common.loadSOGraph(filename=test_data["structured_02"])
+        data = g.serialize(format="nt", encoding="utf-8")
+        # Chunks split lines at arbitrary points
+        chunks = [data[i : i + 10] for i in range(0, len(data), 10)]
+        for target in (
+            sotools.common.openSOStore(str(tmp_path / "corpus.sqlite")),
+            sotools.common.loadSOGraph(data="{}"),
+        ):
+            assert sotools.common.bulkLoad(target, chunks) == len(g)
+            assert len(target) == len(g)
+            assert len(sotools.common.getDatasetIdentifiers(target)) == 3
+
+    def test_failedLoad(self, tmp_path):
+        g = sotools.common.loadSOGraph(filename=test_data["encoding"])
+        corpus = sotools.common.openSOStore(str(tmp_path / "corpus.sqlite"))
+        sotools.common.storeSOGraph(corpus, g, "https://example.org/encoding")
+        before = set(corpus.quads())
+
+        def failing():
+            extra = sotools.common.loadSOGraph(filename=test_data["about"])
+            yield from extra
+            raise ValueError("source failed")
+
+        with pytest.raises(ValueError):
+            # Small batches, so triples reach the store before the failure
+            sotools.common.bulkLoad(corpus, failing(), batch_size=2)
+        assert set(corpus.quads()) == before
+        indexes = {
+            r[0]
+            for r in corpus.store._db.execute(
+                "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='quad'"
+            )
+        }
+        assert {"quad_pos", "quad_os", "quad_g"} <= indexes
+        corpus.close()
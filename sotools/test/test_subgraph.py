@@ -0,0 +1,109 @@
+"""
+Tests for subgraph extraction
+
+Run with::
+
+  $ pytest
+
+"""
+import rdflib
+import rdflib.compare
+import sotools.common
+
+EX = rdflib.Namespace("https://example.net/")
+
+expected_json = """{
+    "@context": {
+        "@vocab":"https://example.net/"
+    },
+    "@id":"./sub",
+    "property_0": "literal_0",
+    "property_1": ["literal_1-0", "literal_1-1"],
+    "property_2": {
+        "property_3":"Anonymous subgraph"
+    }
+}
+"""
+
+test_json = """{
+    "@context": {
+        "@vocab":"https://example.net/"
+    },
+    "@id":"./parent",
+    "sub":""" + expected_json + """,
+    "parent_property":"Should not appear in extracted"
+}
+"""
+
+
+def chain(n, cycle=False):
+    # ex:n0 -> ex:n1 -> ... -> ex:n{n-1}, each also linking a shared bnode
+    g = rdflib.ConjunctiveGraph()
+    shared = rdflib.BNode()
+    g.add((shared, EX.label, rdflib.Literal("shared")))
+    for i in range(n - 1):
+        g.add((EX[f"n{i}"], EX.next, EX[f"n{i + 1}"]))
+        g.add((EX[f"n{i}"], EX.common, shared))
+    if cycle:
+        g.add((EX[f"n{n - 1}"], EX.next, EX.n0))
+    return g
+
+
+class TestSubgraph:
+    def test_getSubgraph(self):
+        g_full = rdflib.ConjunctiveGraph()
+        g_full.parse(data=test_json, format="json-ld", publicID="https://example.net/")
+        g_expected = rdflib.ConjunctiveGraph()
+        g_expected.parse(data=expected_json, format="json-ld", publicID="https://example.net/")
+        g_sub = sotools.common.getSubgraph(g_full, EX.sub)
+        assert rdflib.compare.isomorphic(g_sub, g_expected)
+
+    def test_cycle(self):
+        g = chain(50, cycle=True)
+        g_sub = sotools.common.getSubgraph(g, EX.n10)
+        assert len(g_sub) == len(g)
+
+    def test_maxDepth(self):
+        g = chain(10)
+        assert len(sotools.common.getSubgraph(g, EX.n0, max_depth=0)) == 2
+        # n0, n1 and the shared bnode expanded
+        assert len(sotools.common.getSubgraph(g, EX.n0, max_depth=1)) == 5
+
+    def test_getSubgraphs(self):
+        g = chain(10)
+        g.add((EX.other, EX.common, EX.n8))
+        g_sub = sotools.common.getSubgraphs(g, [EX.n5, EX.other])
+        expected = sotools.common.getSubgraph(g, EX.n5)
+        expected += sotools.common.getSubgraph(g, EX.other)
+        assert len(g_sub) == len(expected)
+        assert (EX.other, EX.common, EX.n8) in g_sub
+        assert (EX.n4, EX.next, EX.n5) not in g_sub
+
+
+class TestSubgraphView:
+    def test_view(self):
+        g = rdflib.ConjunctiveGraph()
+        g.parse(data=test_json, format="json-ld", publicID="https://example.net/")
+        view = sotools.common.getSubgraphView(g, EX.sub)
+        expected = sotools.common.getSubgraph(g, EX.sub)
+        assert len(view) == len(expected)
+        assert set(view) == set(expected)
+        assert len(list(view.triples((None, EX.property_3, None)))) == 1
+        assert len(list(view.triples((EX.parent, None, None)))) == 0
+        qres = view.query("SELECT ?o WHERE { ?s <https://example.net/property_0> ?o }")
+        assert [str(r[0]) for r in qres] == ["literal_0"]
+        g2 = rdflib.Graph()
+        g2.parse(data=view.serialize(format="nt"), format="nt")
+        assert rdflib.compare.isomorphic(g2, expected)
+        m = view.materialize()
+        assert rdflib.compare.isomorphic(m, expected)
+
+    def test_readOnly(self):
+        g = chain(5)
+        view = sotools.common.getSubgraphView(g, EX.n2)
+        try:
+            view.add((EX.n2, EX.label, rdflib.Literal("x")))
+            assert False
+        except rdflib.graph.ModificationException:
+            pass
+        assert len(view) == 5
@@ -0,0 +1,200 @@
+"""
+Tests for SHACL validation
+
+Run with::
+
+  $ pytest
+
+"""
+import os
+import pytest
+import rdflib
+import sotools.common
+
+BASE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = os.path.join(BASE, "../../docsource/source/examples")
+SHAPES = os.path.join(EXAMPLES, "shapes/test_namespace.ttl")
+
+BAD_SHAPES = """@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <https://example.net/> .
+ex:Shape a sh:NodeShape ;
+    sh:property [ sh:path ex:p ; sh:minCount "one" ] .
+"""
+
+
+def loadData(name):
+    g = rdflib.ConjunctiveGraph()
+    g.parse(
+        os.path.join(EXAMPLES, "data", name),
+        format="json-ld",
+        publicID="https://example.net/data/",
+    )
+    return g
+
+
+class TestShapeValidator:
+    def test_validate(self):
+        shape_graph = rdflib.ConjunctiveGraph()
+        shape_graph.parse(SHAPES, format="turtle")
+        validator = sotools.common.ShapeValidator(SHAPES)
+        for name in ("ds_bad_namespace.json", "ds_m_encoding.json"):
+            data_graph = loadData(name)
+            expected = sotools.common.validateSHACL(shape_graph, data_graph)
+            result = validator.validate(data_graph)
+            assert result[0] == expected[0]
+            assert len(result[1]) == len(expected[1])
+        assert not validator.validate(loadData("ds_bad_namespace.json"))[0]
+
+    def test_validateSHACL(self):
+        validator = sotools.common.ShapeValidator(SHAPES)
+        data_graph = loadData("ds_bad_namespace.json")
+        conforms, _, _ = sotools.common.validateSHACL(validator, data_graph)
+        assert not conforms
+
+    def test_badShapes(self):
+        g = rdflib.Graph()
+        g.parse(data=BAD_SHAPES, format="turtle")
+        with pytest.raises(ValueError):
+            sotools.common.ShapeValidator(g)
+        # Skipping the meta validation accepts the shapes as given
+        sotools.common.ShapeValidator(g, meta_shacl=False)
+
+
+class TestValidateSHACLBatch:
+    def inputs(self):
+        bad = loadData("ds_bad_namespace.json")
+        good = loadData("ds_m_encoding.json")
+        return [
+            bad,
+            good.serialize(format="nt", encoding="utf-8"),
+            os.path.join(EXAMPLES, "data", "ds_bad_namespace.json"),
+            os.path.join(EXAMPLES, "data", "missing.json"),
+        ]
+
+    def check(self, results, report):
+        _, expected_graph, _ = sotools.common.validateSHACL(
+            sotools.common.ShapeValidator(SHAPES),
+            loadData("ds_bad_namespace.json"),
+        )
+        assert [r.source for r in results][:2] == [0, 1]
+        # loadSOGraph normalizes the namespace of the file name input
+        assert [r.conforms for r in results] == [False, True, True, None]
+        assert results[3].error is not None
+        n_expected = len(
+            list(expected_graph.subjects(rdflib.RDF.type, rdflib.SH.ValidationResult))
+        )
+        assert len(results[0].results) == n_expected
+        row = results[0].results[0]
+        assert row.severity == rdflib.SH.Violation
+        assert row.message is not None
+        if report:
+            assert len(results[0].report) == len(expected_graph)
+        else:
+            assert results[0].report is None
+
+    def test_serial(self):
+        results = list(
+            sotools.common.validateSHACLBatch(SHAPES, self.inputs(), workers=1)
+        )
+        self.check(results, False)
+
+    def test_pool(self):
+        results = list(
+            sotools.common.validateSHACLBatch(
+                SHAPES, self.inputs(), workers=2, report=True, chunksize=1
+            )
+        )
+        self.check(results, True)
+
+
+SCOPED_SHAPES = """@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix ex: <https://example.net/> .
+ex:ThingShape a sh:NodeShape ;
+    sh:targetClass ex:Thing ;
+    sh:property [ sh:path ex:name ; sh:minCount 1 ] ;
+    sh:property [ sh:path ex:part ; sh:class ex:Part ] .
+"""
+
+SCOPED_ONT = """@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix ex: <https://example.net/> .
+ex:Sub rdfs:subClassOf ex:Thing .
+ex:SubSub rdfs:subClassOf ex:Sub .
+ex:SubPart rdfs:subClassOf ex:Part .
+ex:name rdfs:domain ex:Named .
+"""
+
+SCOPED_DATA = """@prefix ex: <https://example.net/> .
+ex:a a ex:SubSub ; ex:part ex:p1 .
+ex:b a ex:Thing ; ex:name "b" ; ex:part ex:p2 .
+ex:p1 a ex:SubPart .
+ex:p2 a ex:Other .
+"""
+
+TYPED_SHAPE = """@prefix sh: <http://www.w3.org/ns/shacl#> .
+@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .
+@prefix ex: <https://example.net/> .
+ex:TypedShape a sh:NodeShape ;
+    sh:targetNode ex:a ;
+    sh:property [ sh:path rdf:type ; sh:hasValue ex:Thing ] .
+"""
+
+TYPED_DATA = """@prefix ex: <https://example.net/> .
+ex:a a ex:SubSub ; ex:name "a" .
+"""
+
+
+def turtle(text):
+    g = rdflib.Graph()
+    g.parse(data=text, format="turtle")
+    return g
+
+
+def focusNodes(result_graph):
+    return sorted(result_graph.objects(None, rdflib.SH.focusNode))
+
+
+class TestScopedInference:
+    def test_hierarchy(self):
+        hierarchy = sotools.common.getClassHierarchy(turtle(SCOPED_ONT))
+        EX = rdflib.Namespace("https://example.net/")
+        assert hierarchy[EX.SubSub] == {EX.Sub, EX.Thing}
+        assert EX.Thing not in hierarchy
+
+    def test_scoped(self):
+        shapes = turtle(SCOPED_SHAPES)
+        ont = turtle(SCOPED_ONT)
+        data = turtle(SCOPED_DATA)
+        n_data = len(data)
+        full = sotools.common.ShapeValidator(shapes, ont_graph=ont).validate(data)
+        scoped = sotools.common.ShapeValidator(
+            shapes, inference="scoped", ont_graph=ont
+        ).validate(data)
+        assert scoped[0] == full[0] == False
+        assert focusNodes(scoped[1]) == focusNodes(full[1])
+        # ex:a misses a name and ex:b has a part that is not an ex:Part
+        assert len(focusNodes(scoped[1])) == 2
+        assert len(data) == n_data
+
+    def test_dataHierarchy(self):
+        # ex:a conforms only if ex:a a ex:Thing is entailed from the data graph
+        shapes = turtle(SCOPED_SHAPES + TYPED_SHAPE)
+        data = turtle(TYPED_DATA)
+        scoped = sotools.common.ShapeValidator(shapes, inference="scoped")
+        plain = sotools.common.ShapeValidator(shapes, inference="none")
+        # No hierarchy, so nothing is entailed
+        assert not scoped.validate(data)[0]
+        data.parse(data=SCOPED_ONT, format="turtle")
+        n_data = len(data)
+        assert not plain.validate(data)[0]
+        conforms, result_graph, _ = scoped.validate(data)
+        assert conforms
+        assert focusNodes(result_graph) == []
+        assert len(data) == n_data
+
+    def test_validateSHACL(self):
+        shapes = turtle(SCOPED_SHAPES + SCOPED_ONT)
+        conforms, result_graph, _ = sotools.common.validateSHACL(
+            shapes, turtle(SCOPED_DATA), inference="scoped"
+        )
+        assert not conforms
+        assert len(focusNodes(result_graph)) == 2
@@ -0,0 +1,437 @@
+"""
+SHACL validation of graphs
+"""
+
+import collections
+import concurrent.futures
+import logging
+import os
+from rdflib import ConjunctiveGraph, Graph, RDF, RDFS, SH
+import pyshacl
+import pyshacl.entrypoints
+from .loading import loadSOGraph, _chunked
+from .metrics import span
+
+logger = logging.getLogger(__name__)
+
+
+def _subClassParents(graphs, parents=None):
+    """
+    Direct superclasses of each class from the ``rdfs:subClassOf`` statements in graphs
+    """
+    if parents is None:
+        parents = collections.defaultdict(set)
+    for g in graphs:
+        for c, _, sc in g.triples((None, RDFS.subClassOf, None)):
+            if c != sc:
+                parents[c].add(sc)
+    return parents
+
+
+def _closeHierarchy(parents):
+    hierarchy = {}
+    for c in parents:
+        supers = set()
+        todo = list(parents[c])
+        while len(todo) > 0:
+            sc = todo.pop()
+            if sc in supers or sc == c:
+                continue
+            supers.add(sc)
+            todo.extend(parents.get(sc, ()))
+        hierarchy[c] = frozenset(supers)
+    return hierarchy
+
+
+def getClassHierarchy(*graphs):
+    """
+    Transitive superclasses of each class from the ``rdfs:subClassOf`` statements in graphs
+
+    The table can be computed once, e.g. from a schema.org vocabulary graph,
+    and passed as ``hierarchy`` to :class:`ShapeValidator`.
+
+    Args:
+        *graphs (Graph): Graphs containing ``rdfs:subClassOf`` statements
+
+    Returns:
+        dict: Superclasses (frozenset) for each class that has any
+    """
+    return _closeHierarchy(_subClassParents(graphs))
+
+
+def _shapeClasses(shape_graph):
+    """
+    Classes whose instances a shape graph selects or tests for
+
+    These are the objects of ``sh:targetClass`` and ``sh:class``, and shapes
+    that are also classes (implicit class targets).
+    """
+    classes = set(shape_graph.objects(None, SH.targetClass))
+    classes.update(shape_graph.objects(None, SH["class"]))
+    for shape_type in (SH.NodeShape, SH.PropertyShape):
+        for shape in shape_graph.subjects(RDF.type, shape_type):
+            if (shape, RDF.type, RDFS.Class) in shape_graph:
+                classes.add(shape)
+    return classes
+
+
+def _scopedTypes(classes, hierarchy):
+    """
+    Map each subclass to the classes in ``classes`` it entails, skipping empty entries
+    """
+    scoped = {}
+    for c, supers in hierarchy.items():
+        entailed = supers & classes
+        if len(entailed) > 0:
+            scoped[c] = entailed
+    return scoped
+
+
+class ShapeValidator:
+    """
+    Validate many data graphs against one set of SHACL shapes
+
+    The shapes are loaded and checked against the SHACL-SHACL meta shapes
+    once, when the validator is created. Each call to :meth:`validate` then
+    only runs the data graph against the already loaded shapes, which avoids
+    reparsing and meta-validating the shapes for every document.
+
+    With ``inference="scoped"`` the RDFS closure of the data graph is not
+    computed. Instead, only the ``rdf:type`` statements entailed through
+    ``rdfs:subClassOf`` for the classes the shapes target or test with
+    ``sh:class`` are added. The class hierarchy is taken from the shapes,
+    ``ont_graph``, ``hierarchy`` and the data graph. When nothing is entailed
+    the data graph is validated as is, without a copy. Other RDFS entailments,
+    such as types from ``rdfs:domain`` and ``rdfs:range``, are not made.
+
+    Args:
+        shapes (Graph or string): Shape graph, or file name or URL of the shapes
+        format (string): Format of the shapes when loaded from a file
+        inference (string): "scoped", or inference applied to each data graph as for ``pyshacl.validate``
+        advanced (boolean): Enable SHACL advanced features
+        meta_shacl (boolean): Validate the shapes against SHACL-SHACL on creation
+        ont_graph (Graph): Ontology graph, e.g. a schema.org vocabulary
+        hierarchy (dict): Precomputed class hierarchy from :func:`getClassHierarchy`
+
+    Raises:
+        ValueError: If the shapes do not conform to SHACL-SHACL
+
+    Example::
+
+        validator = ShapeValidator("sotools/data/shapes/ds_metadata_encoding_shape.ttl")
+        for g in graphs:
+            conforms, result_graph, result_text = validator.validate(g)
+
+    """
+
+    def __init__(
+        self,
+        shapes,
+        format="turtle",
+        inference="rdfs",
+        advanced=True,
+        meta_shacl=True,
+        ont_graph=None,
+        hierarchy=None,
+    ):
+        if isinstance(shapes, Graph):
+            self.shape_graph = shapes
+        else:
+            self.shape_graph = ConjunctiveGraph()
+            self.shape_graph.parse(shapes, format=format)
+        self.inference = inference
+        self.advanced = advanced
+        self.ont_graph = ont_graph
+        if meta_shacl:
+            with span("meta_validate"):
+                conforms, _, result_text = pyshacl.entrypoints.meta_validate(
+                    self.shape_graph,
+                    inference="rdfs" if inference == "scoped" else inference,
+                )
+            if not conforms:
+                raise ValueError(
+                    "Shapes do not conform to SHACL-SHACL:\n" + result_text
+                )
+        if inference == "scoped":
+            graphs = [self.shape_graph]
+            if ont_graph is not None:
+                graphs.append(ont_graph)
+            self._classes = _shapeClasses(self.shape_graph)
+            self._parents = _subClassParents(graphs)
+            for c, supers in (hierarchy or {}).items():
+                self._parents[c].update(supers)
+            self._scoped = _scopedTypes(self._classes, _closeHierarchy(self._parents))
+
+    def _entail(self, data_graph):
+        """
+        Copy of the data graph with the scoped type entailments added, or itself if there are none
+        """
+        scoped = self._scoped
+        if (None, RDFS.subClassOf, None) in data_graph:
+            parents = collections.defaultdict(set)
+            for c, supers in self._parents.items():
+                parents[c] = set(supers)
+            _subClassParents([data_graph], parents)
+            scoped = _scopedTypes(self._classes, _closeHierarchy(parents))
+        entailed = []
+        for c, supers in scoped.items():
+            for node in data_graph.subjects(RDF.type, c):
+                for sc in supers:
+                    if (node, RDF.type, sc) not in data_graph:
+                        entailed.append((node, RDF.type, sc))
+        if len(entailed) == 0:
+            return data_graph
+        g = Graph()
+        g.addN((s, p, o, g) for s, p, o in data_graph)
+        g.addN((s, p, o, g) for s, p, o in entailed)
+        return g
+
+    def validate(self, data_graph):
+        """
+        Validate a data graph against the loaded shapes.
+
+        Args:
+            data_graph (Graph): Data graph to be validated
+
+        Returns (tuple): Conformance (boolean), result graph (Graph) and result text
+        """
+        inference = self.inference
+        ont_graph = self.ont_graph
+        with span("validate"):
+            if inference == "scoped":
+                data_graph = self._entail(data_graph)
+                inference = "none"
+                ont_graph = None
+            return pyshacl.validate(
+                data_graph,
+                shacl_graph=self.shape_graph,
+                ont_graph=ont_graph,
+                inference=inference,
+                meta_shacl=False,
+                abort_on_first=False,
+                debug=False,
+                advanced=self.advanced,
+            )
+
+
+def validateSHACL(shape_graph, data_graph, inference="rdfs"):
+    """
+    Validate data against a SHACL shape using common options.
+
+    Args:
+        shape_graph (ConjunctiveGraph): A SHACL shape graph, or a :class:`ShapeValidator`
+        data_graph (ConjunctiveGraph): Data graph to be validated with shape_graph
+        inference (string): "rdfs", "scoped" for only the type entailments the shapes
+            need (see :class:`ShapeValidator`), or another ``pyshacl.validate`` inference option.
+            Ignored when shape_graph is a ShapeValidator.
+
+    Returns (tuple): Conformance (boolean), result graph (Graph) and result text
+
+    Example:
+
+    .. jupyter-execute:: examples/code/eg_validate_01.py
+    
+    """
+    if isinstance(shape_graph, ShapeValidator):
+        return shape_graph.validate(data_graph)
+    if inference == "scoped":
+        return ShapeValidator(shape_graph, inference=inference).validate(data_graph)
+    # Includes the meta validation of the shapes
+    with span("validate"):
+        conforms, result_graph, result_text = pyshacl.validate(
+            data_graph,
+            shacl_graph=shape_graph,
+            inference=inference,
+            meta_shacl=True,
+            abort_on_error=False,
+            debug=False,
+            advanced=True,
+        )
+    return conforms, result_graph, result_text
+
+
+SHACLResultRow = collections.namedtuple(
+    "SHACLResultRow", ["focus", "path", "severity", "constraint", "message"]
+)
+SHACLResultRow.__doc__ = """
+One validation result from :func:`validateSHACLBatch`
+
+``focus``, ``path``, ``severity`` and ``constraint`` are the terms of
+``sh:focusNode``, ``sh:resultPath``, ``sh:resultSeverity`` and
+``sh:sourceConstraintComponent``, ``message`` is the text of
+``sh:resultMessage``. Absent values are None.
+"""
+
+SHACLResult = collections.namedtuple(
+    "SHACLResult", ["source", "conforms", "results", "report", "error"]
+)
+SHACLResult.__doc__ = """
+Result of validating one graph with :func:`validateSHACLBatch`
+
+``source`` is the file name of the graph, or its position in the input
+when a graph or N-Triples bytes were given. ``results`` is a list of
+:data:`SHACLResultRow`. ``report`` is the full validation report graph
+when requested, otherwise None. When validation failed ``conforms`` is None
+and ``error`` holds the exception.
+"""
+
+
+def _validationRows(result_graph):
+    """
+    Compact rows for the validation results in a pyshacl report graph
+    """
+    rows = []
+    for r in result_graph.subjects(RDF.type, SH.ValidationResult):
+        messages = [str(m) for m in result_graph.objects(r, SH.resultMessage)]
+        rows.append(
+            SHACLResultRow(
+                result_graph.value(r, SH.focusNode),
+                result_graph.value(r, SH.resultPath),
+                result_graph.value(r, SH.resultSeverity),
+                result_graph.value(r, SH.sourceConstraintComponent),
+                "\n".join(messages) if len(messages) > 0 else None,
+            )
+        )
+    return rows
+
+
+# ShapeValidator of a validateSHACLBatch worker process
+_batch_validator = None
+
+
+def _initShapeWorker(shapes, kwargs):
+    global _batch_validator
+    g = Graph()
+    g.parse(data=shapes, format="nt")
+    _batch_validator = ShapeValidator(g, meta_shacl=False, **kwargs)
+
+
+def _validateChunk(items, report, validator=None):
+    """
+    Validate a list of graphs, N-Triples bytes or file names
+
+    Returns:
+        list: ``(conforms, rows, report, error)`` for each item
+    """
+    if validator is None:
+        validator = _batch_validator
+    res = []
+    for item in items:
+        try:
+            if isinstance(item, Graph):
+                g = item
+            elif isinstance(item, bytes):
+                g = Graph()
+                g.parse(data=item, format="nt")
+            else:
+                g = loadSOGraph(filename=item)
+            conforms, result_graph, _ = validator.validate(g)
+            rows = _validationRows(result_graph)
+            if report:
+                result_graph = result_graph.serialize(format="nt", encoding="utf-8")
+            else:
+                result_graph = None
+            res.append((conforms, rows, result_graph, None))
+        except Exception as e:
+            res.append((None, [], None, e))
+    return res
+
+
+def validateSHACLBatch(
+    shapes, graphs, workers=None, report=False, chunksize=16, prefetch=4, **kwargs
+):
+    """
+    Validate many data graphs against one set of SHACL shapes using a pool of processes
+
+    The shapes are loaded and meta validated once here, and loaded once
+    more in each worker process. Graphs are sent to the workers as N-Triples,
+    file names are loaded by the workers with :func:`loadSOGraph`. Each
+    result carries compact :data:`SHACLResultRow` rows instead of the report
+    graph and text, the report graph is only returned when ``report`` is set.
+    Results are yielded in the order of ``graphs``.
+
+    Args:
+        shapes (Graph or string): Shape graph, or file name or URL of the shapes
+        graphs (iterable): Data graphs, N-Triples bytes, or file names of JSON-LD documents
+        workers (integer): Number of worker processes, defaults to the number of CPUs.
+            With 1 the graphs are validated serially in this process.
+        report (boolean): Include the validation report graph in each result
+        chunksize (integer): Number of graphs sent to a worker per task
+        prefetch (integer): Tasks queued per worker ahead of the consumer
+        **kwargs: ``inference``, ``advanced``, ``ont_graph`` and ``hierarchy``, passed to :class:`ShapeValidator`
+
+    Returns:
+        iterator of SHACLResult: ``(source, conforms, results, report, error)`` for each graph
+
+    Example::
+
+        for res in validateSHACLBatch(shape_file, filenames, workers=4):
+            for row in res.results:
+                print(res.source, row.focus, row.path, row.message)
+
+    """
+    validator = ShapeValidator(shapes, **kwargs)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def _sources(chunk, offset):
+        return [
+            item if isinstance(item, str) else offset + i for i, item in enumerate(chunk)
+        ]
+
+    def _results(sources, validated):
+        for source, (conforms, rows, result_graph, error) in zip(sources, validated):
+            if error is not None:
+                logger.warning(f"Failed to validate {source}: {error}")
+            if isinstance(result_graph, bytes):
+                g = Graph()
+                g.parse(data=result_graph, format="nt")
+                result_graph = g
+            yield SHACLResult(source, conforms, rows, result_graph, error)
+
+    offset = 0
+    if workers <= 1:
+        for chunk in _chunked(graphs, chunksize):
+            yield from _results(
+                _sources(chunk, offset), _validateChunk(chunk, report, validator)
+            )
+            offset += len(chunk)
+        return
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_initShapeWorker,
+        initargs=(
+            validator.shape_graph.serialize(format="nt", encoding="utf-8"),
+            kwargs,
+        ),
+    )
+    pending = collections.deque()
+    try:
+
+        def _collect(sources, future):
+            try:
+                validated = future.result()
+            except Exception as e:
+                validated = [(None, [], None, e)] * len(sources)
+            yield from _results(sources, validated)
+
+        for chunk in _chunked(graphs, chunksize):
+            sources = _sources(chunk, offset)
+            offset += len(chunk)
+            chunk = [
+                item.serialize(format="nt", encoding="utf-8")
+                if isinstance(item, Graph)
+                else item
+                for item in chunk
+            ]
+            pending.append((sources, executor.submit(_validateChunk, chunk, report)))
+            if len(pending) >= workers * prefetch:
+                yield from _collect(*pending.popleft())
+        while len(pending) > 0:
+            yield from _collect(*pending.popleft())
+    finally:
+        # Tasks not yet started when the consumer stops early are dropped,
+        # shutdown(cancel_futures=True) needs Python 3.9
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)